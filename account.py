@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+class AccountCache(object):
+    MAX_AGE = 300  # 300S
+
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, api, max_age=None):
+        self._api = api
+        self._max_age = AccountCache.MAX_AGE if max_age is None else max_age
+        self._balance = None
+        self._positions = {}
+        self._refreshed = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        api.on_order(self.invalidate)
+
+    @staticmethod
+    def for_api(api, max_age=None):
+        # One cache per key, balance and positions belong to the account and not to the pair an engine trades.
+        with AccountCache._caches_lock:
+            cache = AccountCache._caches.get(api.key)
+            if cache is None:
+                cache = AccountCache._caches[api.key] = AccountCache(api, max_age)
+            return cache
+
+    def invalidate(self, *args):
+        self._dirty = True
+
+    def is_stale(self):
+        return self._dirty or time.monotonic() - self._refreshed >= self._max_age
+
+    def _refresh(self):
+        with self._lock:
+            if not self.is_stale():
+                return
+            # Cleared first, an order sent while the requests are on their way marks the cache dirty again.
+            self._dirty = False
+            try:
+                balance = self._api.get_balances()
+                positions = self._api.get_active_positions()
+            except Exception:
+                self._dirty = True
+                raise
+            self._balance = balance
+            self._positions = {p.symbol: p for p in positions.positions_list}
+            self._refreshed = time.monotonic()
+            self.refreshes += 1
+
+    @property
+    def balance(self):
+        if self.is_stale():
+            self._refresh()
+        return self._balance
+
+    def position(self, trade_pair):
+        if self.is_stale():
+            self._refresh()
+        return self._positions.get(trade_pair.lower())
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
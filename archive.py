@@ -0,0 +1,322 @@
+import bisect
+import candlestick
+import importlib
+import os
+import startup
+import struct
+import zlib
+
+np = startup.lazy_import('numpy')
+
+MAGIC = b'ASCA'
+VERSION = 2
+BLOCK_SIZE = 4096
+MAX_DECIMALS = 10
+
+COLUMNS = ('mts', 'open', 'close', 'high', 'low', 'volume')
+
+_HEADER = struct.Struct('<4sH')
+_FOOTER = struct.Struct('<Q4s')
+_FRAME = struct.Struct('<4sIqqI')
+FRAME_MAGIC = b'ASCK'
+_INDEX = struct.Struct('<qqQII')
+_BLOCK = struct.Struct('<BI')
+_COLUMN = struct.Struct('<BbBI')
+
+# Column encodings.
+_SCALED = 0
+_XOR = 1
+
+_INT_TYPES = ('<i1', '<i2', '<i4', '<i8')
+
+
+class Zlib(object):
+    ID = 0
+
+    def __init__(self, level=6):
+        self._level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self._level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class Zstd(object):
+    ID = 1
+
+    def __init__(self, level=3):
+        zstandard = _optional('zstandard', 'zstd')
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+
+class LZ4(object):
+    ID = 2
+
+    def __init__(self):
+        self._frame = _optional('lz4.frame', 'lz4')
+
+    def compress(self, data):
+        return self._frame.compress(data)
+
+    def decompress(self, data):
+        return self._frame.decompress(data)
+
+
+CODECS = {'zlib': Zlib, 'zstd': Zstd, 'lz4': LZ4}
+_CODEC_IDS = {cls.ID: cls for cls in CODECS.values()}
+
+
+def _optional(module, codec):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError(f'The {codec} codec needs the {module.split(".")[0]} package, '
+                          f'install it or use codec=\'zlib\'') from None
+
+
+def _narrow(values):
+    # Smallest integer width holding every value, deltas of prices and timestamps rarely need 64 bits.
+    low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    for dtype in _INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _decimals(values):
+    # Fewest decimals that give every value back bit for bit, None when some value needs more than MAX_DECIMALS.
+    for decimals in range(MAX_DECIMALS + 1):
+        scale = 10.0 ** decimals
+        scaled = np.round(values * scale)
+        if np.abs(scaled).max(initial=0.0) < 2.0 ** 53 and np.array_equal(scaled / scale, values):
+            return decimals, scaled.astype(np.int64)
+    return None, None
+
+
+def _encode_column(values):
+    if values.dtype == np.int64:
+        decimals, scaled = 0, values
+    else:
+        decimals, scaled = _decimals(values)
+    if decimals is not None:
+        data = _narrow(np.diff(scaled, prepend=0))
+        return _COLUMN.pack(_SCALED, decimals, data.dtype.itemsize, len(data)) + data.tobytes()
+
+    # XOR of consecutive doubles keeps sign and exponent bytes mostly zero, the byte shuffle groups them together.
+    bits = values.view(np.uint64)
+    xored = bits ^ np.concatenate(([np.uint64(0)], bits[:-1]))
+    shuffled = xored.view(np.uint8).reshape(-1, 8).T.copy()
+    return _COLUMN.pack(_XOR, 0, 8, len(values)) + shuffled.tobytes()
+
+
+def _decode_column(buffer, offset, integer):
+    kind, decimals, itemsize, count = _COLUMN.unpack_from(buffer, offset)
+    offset += _COLUMN.size
+    size = itemsize * count
+    if kind == _SCALED:
+        data = np.frombuffer(buffer, dtype=_INT_TYPES[itemsize.bit_length() - 1], count=count, offset=offset)
+        values = np.cumsum(data, dtype=np.int64)
+        if not integer:
+            values = values / (10.0 ** decimals)
+    else:
+        shuffled = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=offset).reshape(8, count)
+        xored = shuffled.T.copy().view(np.uint64).ravel()
+        values = np.bitwise_xor.accumulate(xored).view(np.float64)
+    return values, offset + size
+
+
+def encode_block(columns, codec):
+    count = len(columns['mts'])
+    body = b''.join(_encode_column(np.ascontiguousarray(columns[name])) for name in COLUMNS)
+    return _BLOCK.pack(codec.ID, count) + codec.compress(body)
+
+
+def decode_block(buffer):
+    codec_id, count = _BLOCK.unpack_from(buffer, 0)
+    body = _CODEC_IDS[codec_id]().decompress(buffer[_BLOCK.size:])
+    columns = {}
+    offset = 0
+    for name in COLUMNS:
+        columns[name], offset = _decode_column(body, offset, name == 'mts')
+    return columns
+
+
+class CandleArchive(object):
+    def __init__(self, filename, codec='zlib', block_size=BLOCK_SIZE):
+        self.filename = filename
+        self.block_size = block_size
+        self._codec = CODECS[codec]()
+        self._index = []
+        self._data_end = _HEADER.size
+        if os.path.exists(filename):
+            self._read_index()
+
+    @property
+    def count(self):
+        return sum(entry[4] for entry in self._index)
+
+    @property
+    def first_mts(self):
+        return self._index[0][0] if self._index else None
+
+    @property
+    def last_mts(self):
+        return self._index[-1][1] if self._index else None
+
+    def _read_index(self):
+        with open(self.filename, 'rb') as file:
+            magic, version = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f'Not a candle archive of version {VERSION}')
+            size = file.seek(0, os.SEEK_END)
+            index_offset, magic = (0, None) if size < _HEADER.size + _FOOTER.size else \
+                _FOOTER.unpack_from(self._read_at(file, size - _FOOTER.size, _FOOTER.size))
+            index_size = size - _FOOTER.size - index_offset
+            if magic != MAGIC or not _HEADER.size <= index_offset <= size - _FOOTER.size or index_size % _INDEX.size:
+                self._recover(file, size)
+                return
+            data = self._read_at(file, index_offset, index_size)
+        self._index = [_INDEX.unpack_from(data, i) for i in range(0, len(data), _INDEX.size)]
+        self._data_end = index_offset
+
+    @staticmethod
+    def _read_at(file, offset, size):
+        file.seek(offset)
+        return file.read(size)
+
+    def _recover(self, file, size):
+        # No valid index at the end, an append was cut short. Every block is framed with its length, mts range and
+        # checksum, so the index is rebuilt from the blocks that were completely written and the rest is dropped
+        # on the next append.
+        self._index = []
+        offset = _HEADER.size
+        while offset + _FRAME.size <= size:
+            magic, length, first_mts, last_mts, crc = _FRAME.unpack(self._read_at(file, offset, _FRAME.size))
+            data = file.read(length)
+            if magic != FRAME_MAGIC or len(data) != length or zlib.crc32(data) != crc:
+                break
+            count = _BLOCK.unpack_from(data, 0)[1]
+            self._index.append((first_mts, last_mts, offset + _FRAME.size, length, count))
+            offset += _FRAME.size + length
+        self._data_end = offset
+
+    def append(self, columns):
+        # Only candles newer than the archive are added, the index is rewritten after the new blocks.
+        mts = np.asarray(columns['mts'], dtype=np.int64)
+        start = 0 if self.last_mts is None else int(np.searchsorted(mts, self.last_mts, side='right'))
+        if start >= len(mts):
+            return 0
+        columns = {name: np.asarray(columns[name], dtype=np.int64 if name == 'mts' else np.float64)[start:]
+                   for name in COLUMNS}
+
+        # The old index is overwritten by the new blocks. If that is cut short, the framed blocks already on disk are
+        # still found by _recover() and the partial one is ignored.
+        mode = 'r+b' if os.path.exists(self.filename) else 'wb'
+        index, data_end = list(self._index), self._data_end
+        try:
+            with open(self.filename, mode) as file:
+                if mode == 'wb':
+                    file.write(_HEADER.pack(MAGIC, VERSION))
+                file.seek(self._data_end)
+                file.truncate()
+                for i in range(0, len(columns['mts']), self.block_size):
+                    block = {name: column[i:i + self.block_size] for name, column in columns.items()}
+                    data = encode_block(block, self._codec)
+                    first_mts, last_mts = int(block['mts'][0]), int(block['mts'][-1])
+                    file.write(_FRAME.pack(FRAME_MAGIC, len(data), first_mts, last_mts, zlib.crc32(data)) + data)
+                    self._index.append((first_mts, last_mts, self._data_end + _FRAME.size, len(data),
+                                        len(block['mts'])))
+                    self._data_end += _FRAME.size + len(data)
+                file.write(b''.join(_INDEX.pack(*entry) for entry in self._index))
+                file.write(_FOOTER.pack(self._data_end, MAGIC))
+                file.flush()
+                os.fsync(file.fileno())
+        except BaseException:
+            self._index, self._data_end = index, data_end
+            raise
+        return len(columns['mts'])
+
+    def append_history(self, candle_history):
+        return self.append({name: candle_history.column(name) for name in COLUMNS})
+
+    def blocks(self, start_mts=None, end_mts=None):
+        # Binary search on the index, only blocks overlapping [start_mts, end_mts] are read and decoded.
+        first = 0 if start_mts is None else bisect.bisect_left([entry[1] for entry in self._index], start_mts)
+        last = len(self._index) if end_mts is None else bisect.bisect_right([entry[0] for entry in self._index],
+                                                                              end_mts)
+        return self._index[first:last]
+
+    def read(self, start_mts=None, end_mts=None):
+        parts = []
+        with open(self.filename, 'rb') as file:
+            for _, _, offset, length, _ in self.blocks(start_mts, end_mts):
+                file.seek(offset)
+                parts.append(decode_block(file.read(length)))
+        if not parts:
+            return {name: np.empty(0, dtype=np.int64 if name == 'mts' else np.float64) for name in COLUMNS}
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+        mts = columns['mts']
+        low = 0 if start_mts is None else int(np.searchsorted(mts, start_mts, side='left'))
+        high = len(mts) if end_mts is None else int(np.searchsorted(mts, end_mts, side='right'))
+        return {name: column[low:high] for name, column in columns.items()}
+
+
+class ArchiveHistory(candlestick.CandleHistory):
+    def __init__(self, filename, trade_pair, time_frame, start_mts=None, end_mts=None):
+        self._archive = CandleArchive(filename)
+        self._start_mts = start_mts
+        self._end_mts = end_mts
+        super().__init__(trade_pair, time_frame, 0)
+        self.update()
+
+    @property
+    def candles(self):
+        self._materialize()
+        return super().candles
+
+    def since(self, mts):
+        self._materialize()
+        return super().since(mts)
+
+    def to_sheet(self):
+        self._materialize()
+        return super().to_sheet()
+
+    def update(self):
+        # Columns come straight from the archive, candle objects are only built for the code that asks for them.
+        self._columns = self._archive.read(self._start_mts, self._end_mts)
+        for column in self._columns.values():
+            column.flags.writeable = False
+        self._size = len(self._columns['mts'])
+        self._candle_list = []
+
+    def _materialize(self):
+        if self._candle_list or not self._size:
+            return
+        for mts, open_, close, high, low, volume in zip(*[self._columns[name].tolist() for name in COLUMNS]):
+            candle = candlestick.Candle()
+            candle.mts = mts
+            candle.open = open_
+            candle.close = close
+            candle.high = high
+            candle.low = low
+            candle.volume = volume
+            self._candle_list.append(candle)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
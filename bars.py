@@ -0,0 +1,215 @@
+import candlestick
+import copy
+import json
+import ratelimit
+import transport
+
+
+class Trade(object):
+    URI = 'https://api.bitfinex.com/v2/trades/t{0}/hist?limit={1}&sort=1&start={2}'
+
+    def __init__(self):
+        self.id = 0
+        self.mts = 0
+        self.amount = 0.0
+        self.price = 0.0
+
+    @property
+    def volume(self):
+        return abs(self.amount)
+
+    @staticmethod
+    def from_row(row):
+        trade = Trade()
+        trade.id = int(row[0])
+        trade.mts = int(row[1])
+        trade.amount = float(row[2])
+        trade.price = float(row[3])
+        return trade
+
+    @staticmethod
+    def from_json(json_string):
+        return Trade.from_row(json.loads(json_string))
+
+    @staticmethod
+    def last_trades(trade_pair, start=0, limit=1000):
+        uri = Trade.URI.format(trade_pair, limit, start)
+        ratelimit.acquire(ratelimit.RateLimiter.TRADES)
+        response = transport.get(uri)
+        return [Trade.from_row(row) for row in json.loads(response.content)]
+
+    @staticmethod
+    def replay(filename):
+        # Recorded trades, one per line, either bare rows or websocket [chan_id, 'te'/'tu', row] frames.
+        with open(filename, 'r') as file:
+            for line in file:
+                frame = json.loads(line)
+                if len(frame) == 3 and isinstance(frame[2], list):
+                    if frame[1] != 'te':
+                        continue
+                    frame = frame[2]
+                yield Trade.from_row(frame)
+
+
+class BarBuilder(object):
+    def __init__(self):
+        self._candle = None
+        self._count = 0
+        self._volume = 0.0
+        self._notional = 0.0
+
+    @property
+    def current(self):
+        return copy.copy(self._candle) if self._candle else None
+
+    def _is_new_bar(self, trade):
+        raise NotImplementedError()
+
+    def _is_complete(self):
+        raise NotImplementedError()
+
+    def _bar_mts(self, trade):
+        return trade.mts
+
+    def _open(self, trade):
+        candle = candlestick.Candle()
+        candle.mts = self._bar_mts(trade)
+        candle.open = candle.close = candle.high = candle.low = trade.price
+        candle.volume = 0.0
+        self._candle = candle
+        self._count = 0
+        self._volume = 0.0
+        self._notional = 0.0
+
+    def add(self, trade):
+        completed = []
+        if self._candle is not None and self._is_new_bar(trade):
+            completed.append(self._candle)
+            self._candle = None
+        if self._candle is None:
+            self._open(trade)
+
+        candle = self._candle
+        candle.close = trade.price
+        if trade.price > candle.high:
+            candle.high = trade.price
+        if trade.price < candle.low:
+            candle.low = trade.price
+        candle.volume += trade.volume
+        self._count += 1
+        self._volume += trade.volume
+        self._notional += trade.volume * trade.price
+
+        # Threshold bars close on the trade that crosses the threshold, trades are never split between bars.
+        if self._is_complete():
+            completed.append(self._candle)
+            self._candle = None
+        return completed
+
+    def add_all(self, trades):
+        completed = []
+        for trade in trades:
+            completed.extend(self.add(trade))
+        return completed
+
+    def flush(self):
+        candle, self._candle = self._candle, None
+        return [candle] if candle else []
+
+
+class TimeBarBuilder(BarBuilder):
+    def __init__(self, period_ms=60000):
+        super().__init__()
+        self._period_ms = period_ms
+
+    def _bar_mts(self, trade):
+        return trade.mts - trade.mts % self._period_ms
+
+    def _is_new_bar(self, trade):
+        return self._bar_mts(trade) != self._candle.mts
+
+    def _is_complete(self):
+        return False
+
+
+class TickBarBuilder(BarBuilder):
+    def __init__(self, ticks=100):
+        super().__init__()
+        self._ticks = ticks
+
+    def _is_new_bar(self, trade):
+        return False
+
+    def _is_complete(self):
+        return self._count >= self._ticks
+
+
+class VolumeBarBuilder(BarBuilder):
+    def __init__(self, volume=10.0):
+        super().__init__()
+        self._threshold = volume
+
+    def _is_new_bar(self, trade):
+        return False
+
+    def _is_complete(self):
+        return self._volume >= self._threshold
+
+
+class DollarBarBuilder(BarBuilder):
+    def __init__(self, notional=100000.0):
+        super().__init__()
+        self._threshold = notional
+
+    def _is_new_bar(self, trade):
+        return False
+
+    def _is_complete(self):
+        return self._notional >= self._threshold
+
+
+class LocalCandleHistory(candlestick.CandleHistory):
+    def __init__(self, trade_pair, builder, size=500, time_frame='local'):
+        super().__init__(trade_pair, time_frame, size)
+        self._builder = builder
+
+    @property
+    def size(self):
+        return len(self._candle_list)
+
+    @property
+    def builder(self):
+        return self._builder
+
+    def update(self):
+        # Bars are pushed in with ingest(), there is nothing to fetch.
+        pass
+
+    def append(self, candle):
+        self._candle_list.append(candle)
+        if len(self._candle_list) > self._size:
+            del self._candle_list[0]
+        self._columns = {}
+
+    def ingest(self, trades):
+        completed = self._builder.add_all(trades)
+        for candle in completed:
+            self.append(candle)
+        return completed
+
+
+def new_builder(kind, threshold):
+    return {
+        'time': TimeBarBuilder,
+        'tick': TickBarBuilder,
+        'volume': VolumeBarBuilder,
+        'dollar': DollarBarBuilder
+    }[kind](threshold)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+import account
+import archive
+import argparse
+import cache
+import candlestick
+import engine
+import exchange
+import indicator
+import json
+import nonce
+import os
+import random
+import strategy
+import sys
+import tempfile
+import time
+import tracemalloc
+import transport
+import view
+
+
+SIZES = [500, 10000, 1000000]
+REPEAT = 3
+TOLERANCE = 0.25
+
+
+class SyntheticHistory(candlestick.CandleHistory):
+    def __init__(self, size, seed=42, trade_pair='BTCUSD', time_frame='1m'):
+        self._seed = seed
+        super().__init__(trade_pair, time_frame, size)
+        self.update()
+
+    def update(self):
+        # Geometric random walk, deterministic for a given seed so runs are comparable.
+        rnd = random.Random(self._seed)
+        price = 10000.0
+        self._candle_list = []
+        for i in range(self._size):
+            candle = candlestick.Candle()
+            candle.mts = 1514764800000 + i * 60000
+            candle.open = price
+            price *= 1.0 + rnd.gauss(0.0, 0.005)
+            candle.close = price
+            candle.high = max(candle.open, candle.close) * (1.0 + abs(rnd.gauss(0.0, 0.002)))
+            candle.low = min(candle.open, candle.close) * (1.0 - abs(rnd.gauss(0.0, 0.002)))
+            candle.volume = rnd.uniform(1.0, 100.0)
+            self._candle_list.append(candle)
+        self._columns = {}
+
+    def to_raw(self):
+        # Same shape and order as the candles/hist endpoint, newest first.
+        return json.dumps([[c.mts, c.open, c.close, c.high, c.low, c.volume] for c in reversed(self._candle_list)])
+
+
+class RecordedHistory(candlestick.CandleHistory):
+    def __init__(self, filename, trade_pair='BTCUSD', time_frame='1m'):
+        with open(filename, 'r') as file:
+            self._content = file.read()
+        super().__init__(trade_pair, time_frame, 0)
+        self.update()
+
+    def update(self):
+        self._candle_list = candlestick.CandleHistory.parse(self._content)
+        self._size = len(self._candle_list)
+        self._columns = {}
+
+    def to_raw(self):
+        return self._content
+
+
+def offline_engine(history):
+    # Constructors do no I/O, so an engine only needs its state filled with plausible values to run offline.
+    eng = engine.Engine(history.trade_pair, history.time_frame, history.size)
+    eng.history = history
+    st = eng.state
+    st.balance = exchange.BalanceResponse()
+    st.balance.total_usd = 1000.0
+    st.balance.total_available_usd = 1000.0
+    st.position = None
+    st.mts = int(history.column('mts')[-1])
+    st.last_price = float(history.column('close')[-1])
+    st.peak_price = float(history.column('high')[-1])
+    st.bottom_price = float(history.column('low')[-1])
+    st.daily_volume = float(history.column('volume')[-1])
+
+    eng.stgy1.think(history, int(history.size / 2))
+    eng.stgy2.think(history, int(history.size / 2))
+    return eng
+
+
+def report_update(eng):
+    report = view.ReportView()
+    eng.report_update(report)
+    return report.string_buffer
+
+
+def uncached(history, func):
+    # Repeats reuse one history, without this every run after the first would only time a memo hit.
+    def run():
+        history.clear_memo()
+        return func()
+    return run
+
+
+def cases(history):
+    size = history.size
+    response_size = int(size / 2)
+    result = []
+    for name in ('ema', 'bb', 'kvo', 'macd', 'sma', 'tsi', 'adx', 'rsi', 'kox', 'donchian', 'stoch', 'atr', 'obv', 'vwap',
+                 'ichimoku'):
+        ind = indicator.new_indicator(name)
+        result.append((f'indicator.{name}', lambda i=ind: i.calculate(history, response_size)))
+    for name in ('ema', 'sma', 'rsi', 'bb', 'macd'):
+        result.append((f'batch8.{name}', lambda n=name: indicator.batch_calculate(n, [history] * 8, response_size)))
+    if size >= 400:
+        result.append(('strategy.one', uncached(history, lambda: strategy.StrategyOne().think(history, response_size))))
+        result.append(('strategy.two', uncached(history, lambda: strategy.StrategyTwo().think(history, response_size))))
+        result.append(('strategy.one.signals', lambda: strategy.StrategyOne().signals(history)))
+        eng = offline_engine(history)
+        result.append(('engine.report_update', lambda: report_update(eng)))
+    raw = history.to_raw()
+    result.append(('candlestick.parse', lambda: candlestick.CandleHistory.parse(raw)))
+    columns = {name: history.column(name) for name in archive.COLUMNS}
+    block = archive.encode_block(columns, archive.Zlib())
+    result.append(('archive.encode', lambda: archive.encode_block(columns, archive.Zlib())))
+    result.append(('archive.decode', lambda: archive.decode_block(block)))
+    return result
+
+
+def cassette_engine(trade_pair, time_frame, size):
+    # Replayed responses do not check signatures, any key works and nothing is written next to the real ones.
+    eng = engine.Engine(trade_pair, time_frame, size)
+    eng.checkpoint_file = os.path.join(tempfile.gettempdir(), os.path.basename(eng.checkpoint_file))
+    eng.state.use_api(exchange.ExchangeApi(('cassette', 'cassette'), nonce.NonceService()))
+    return eng
+
+
+def cassette_loop_once(eng):
+    # Caches are emptied first, every run goes through transport, parsing and the strategies.
+    cache.ResponseCache.shared().invalidate()
+    account.AccountCache.for_api(eng.state._api).invalidate()
+    return eng.loop_once()
+
+
+def cassette_cases(filename, latency_scale, trade_pair, time_frame, size):
+    transport.use(transport.ReplayTransport(filename, latency_scale, loop=True))
+    eng = cassette_engine(trade_pair, time_frame, size)
+    eng.state.warm_up()
+    eng.history.update()
+    return [('engine.loop_once', lambda: cassette_loop_once(eng))]
+
+
+def record(filename, loops, trade_pair, time_frame, size):
+    # Live run against the exchange with the keys in config.ini, every response is kept for replaying later.
+    with transport.recording(filename) as recorder:
+        eng = engine.Engine(trade_pair, time_frame, size)
+        engine.warm_up([eng])
+        for _ in range(loops):
+            cassette_loop_once(eng)
+    print(f'{recorder.recorded} responses recorded to {filename}')
+
+
+def measure(func, repeat):
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        elapsed = min(elapsed, time.perf_counter() - start_time)
+
+    # Memory is traced in a separate run, tracemalloc slows the code down too much to time it at the same time.
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(histories, repeat, only=None, extra_cases=()):
+    results = {}
+    groups = [(history.size, cases(history)) for history in histories] + list(extra_cases)
+    for size, group in groups:
+        for name, func in group:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            key = f'{name}[{size}]'
+            elapsed, peak = measure(func, repeat)
+            results[key] = {'time': elapsed, 'peak_memory': peak}
+            print(f'{key:<36} {elapsed * 1000:>12.3f} ms {peak / 1024:>12.1f} KiB', flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ('time', 'peak_memory'):
+            if base[metric] > 0 and result[metric] > base[metric] * (1.0 + tolerance):
+                regressions.append(f'{key} {metric}: {base[metric]:.6g} -> {result[metric]:.6g}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmarks for indicators, strategies and parsing.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--recorded', nargs='*', default=[], help='raw candles/hist JSON files')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--only', nargs='*', help='case name prefixes, e.g. indicator.ema strategy')
+    parser.add_argument('--save', help='write the results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--cassette', help='recorded transport file, replayed for engine.loop_once')
+    parser.add_argument('--latency-scale', type=float, default=0.0, help='replayed latency, 1.0 is as recorded')
+    parser.add_argument('--record', help='record a cassette from the live exchange and exit')
+    parser.add_argument('--loops', type=int, default=5, help='engine loops to record')
+    parser.add_argument('--pair', default='BTCUSD')
+    parser.add_argument('--time-frame', default='3h')
+    parser.add_argument('--size', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record, args.loops, args.pair, args.time_frame, args.size)
+        return 0
+
+    histories = [SyntheticHistory(size) for size in args.sizes]
+    histories += [RecordedHistory(filename) for filename in args.recorded]
+    extra_cases = []
+    if args.cassette:
+        extra_cases.append((args.size, cassette_cases(args.cassette, args.latency_scale, args.pair, args.time_frame,
+                                                      args.size)))
+    results = run(histories, args.repeat, args.only, extra_cases)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
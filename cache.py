@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache(object):
+    TICKER = 'ticker'
+    CANDLE = 'candle'
+    HISTORY = 'history'
+
+    # Seconds, the ticker and the last candle move with every trade, the history only through its last candle.
+    TTLS = {
+        TICKER: 1.0,
+        CANDLE: 1.0,
+        HISTORY: 5.0
+    }
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_entries=256, ttls=None):
+        self._max_entries = max_entries
+        self._ttls = dict(ttls or ResponseCache.TTLS)
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._hits = {endpoint: 0 for endpoint in self._ttls}
+        self._misses = {endpoint: 0 for endpoint in self._ttls}
+        self._coalesced = {endpoint: 0 for endpoint in self._ttls}
+        self._evictions = 0
+
+    @staticmethod
+    def shared():
+        # One cache per process, engines on the same pair ask for the same data.
+        with ResponseCache._shared_lock:
+            if ResponseCache._shared is None:
+                ResponseCache._shared = ResponseCache()
+            return ResponseCache._shared
+
+    def get(self, endpoint, key, fetch):
+        key = (endpoint, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits[endpoint] += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._misses[endpoint] += 1
+            else:
+                self._coalesced[endpoint] += 1
+
+        if not leader:
+            # Single flight: wait for the request already on its way instead of sending another one.
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._store(key, endpoint, flight.value)
+            flight.event.set()
+        return flight.value
+
+    def _store(self, key, endpoint, value):
+        self._entries[key] = (time.monotonic() + self._ttls[endpoint], value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, endpoint=None):
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == endpoint]:
+                    del self._entries[key]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'evictions': self._evictions,
+                'endpoints': {
+                    endpoint: {
+                        'hits': self._hits[endpoint],
+                        'misses': self._misses[endpoint],
+                        'coalesced': self._coalesced[endpoint]
+                    } for endpoint in self._ttls
+                }
+            }
+
+
+def get(endpoint, key, fetch):
+    return ResponseCache.shared().get(endpoint, key, fetch)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
+import cache
 import copy
 import json
-import requests
+import ratelimit
+import startup
+import transport
+
+np = startup.lazy_import('numpy')
 
 
 class Candle(object):
@@ -60,8 +65,8 @@ class Candle(object):
     @staticmethod
     def last_candle(trade_pair, time_frame):
         uri = Candle.URI.format(time_frame, trade_pair)
-        response = requests.get(uri)
-        return Candle.from_json(response.content)
+        content = cache.get(cache.ResponseCache.CANDLE, uri, lambda: fetch(uri, ratelimit.RateLimiter.CANDLES))
+        return Candle.from_json(content)
 
 
 class CandleHistory(object):
@@ -72,7 +77,7 @@ class CandleHistory(object):
         self._time_frame = time_frame
         self._size = size
         self._candle_list = []
-        self.update()
+        self._columns = {}
 
     @property
     def candles(self):
@@ -81,6 +86,40 @@ class CandleHistory(object):
     @candles.setter
     def candles(self, value):
         self._candle_list = value
+        self._columns = {}
+
+    def since(self, mts):
+        # Candles from the one stamped mts onwards, None when it already left the window.
+        for i in range(len(self._candle_list) - 1, -1, -1):
+            if self._candle_list[i].mts == mts:
+                return copy.deepcopy(self._candle_list[i:])
+            if self._candle_list[i].mts < mts:
+                break
+        return None
+
+    def column(self, name):
+        # Columns are built once per update and shared by every indicator reading the same source.
+        column = self._columns.get(name)
+        if column is None:
+            dtype = np.int64 if name == 'mts' else np.float64
+            column = np.fromiter((getattr(c, name) for c in self._candle_list), dtype=dtype,
+                                 count=len(self._candle_list))
+            column.flags.writeable = False
+            self._columns[name] = column
+        return column
+
+    def memo(self, key, compute):
+        # Anything derived from the candles of this update, dropped together with the columns on the next one.
+        key = ('memo', key)
+        value = self._columns.get(key)
+        if value is None:
+            value = compute()
+            self._columns[key] = value
+        return value
+
+    def clear_memo(self):
+        for key in [key for key in self._columns if isinstance(key, tuple) and key[0] == 'memo']:
+            del self._columns[key]
 
     @property
     def size(self):
@@ -96,9 +135,14 @@ class CandleHistory(object):
 
     def update(self):
         uri = CandleHistory.URI.format(self._time_frame, self._trade_pair, self._size)
-        response = requests.get(uri)
-        data = json.loads(response.content)
-        self._candle_list = []
+        content = cache.get(cache.ResponseCache.HISTORY, uri, lambda: fetch(uri, ratelimit.RateLimiter.CANDLES))
+        self._candle_list = CandleHistory.parse(content)
+        self._columns = {}
+
+    @staticmethod
+    def parse(content):
+        data = json.loads(content)
+        candle_list = []
         for row in data:
             candle = Candle()
             candle.mts = int(row[0])
@@ -107,8 +151,9 @@ class CandleHistory(object):
             candle.high = float(row[3])
             candle.low = float(row[4])
             candle.volume = float(row[5])
-            self._candle_list.append(candle)
-        self._candle_list.reverse()
+            candle_list.append(candle)
+        candle_list.reverse()
+        return candle_list
 
     def to_sheet(self):
         mts_list = []
@@ -199,8 +244,15 @@ class Ticker(object):
     @staticmethod
     def last_ticker(trade_pair):
         ticker_uri = Ticker.URI.format(trade_pair)
-        response = requests.get(ticker_uri)
-        return Ticker.from_json(response.content)
+        content = cache.get(cache.ResponseCache.TICKER, ticker_uri,
+                            lambda: fetch(ticker_uri, ratelimit.RateLimiter.TICKER))
+        return Ticker.from_json(content)
+
+
+def fetch(uri, endpoint):
+    # Only the raw content is cached, every caller parses its own objects.
+    ratelimit.acquire(endpoint)
+    return transport.get(uri).content
 
 
 def main():
@@ -0,0 +1,113 @@
+import os
+import struct
+
+MAGIC = b'ASCB'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sHq')
+_STATE = struct.Struct('<ddd')
+_COUNT = struct.Struct('<H')
+_MATRIX = struct.Struct('<II')
+
+
+def _pack_string(value):
+    data = value.encode('utf-8')
+    return _COUNT.pack(len(data)) + data
+
+
+def _unpack_string(buffer, offset):
+    (size,) = _COUNT.unpack_from(buffer, offset)
+    offset += _COUNT.size
+    return buffer[offset:offset + size].decode('utf-8'), offset + size
+
+
+def _pack_field(value):
+    # A field is either a string, a vector of floats or a matrix of floats (list of equally sized rows).
+    if isinstance(value, str):
+        return b's' + _pack_string(value)
+    if value and isinstance(value[0], (list, tuple)):
+        rows, cols = len(value), len(value[0])
+        flat = [float(v) for row in value for v in row]
+        return b'm' + _MATRIX.pack(rows, cols) + struct.pack(f'<{rows * cols}d', *flat)
+    return b'f' + _MATRIX.pack(len(value), 1) + struct.pack(f'<{len(value)}d', *[float(v) for v in value])
+
+
+def _unpack_field(buffer, offset):
+    tag = buffer[offset:offset + 1]
+    offset += 1
+    if tag == b's':
+        return _unpack_string(buffer, offset)
+    rows, cols = _MATRIX.unpack_from(buffer, offset)
+    offset += _MATRIX.size
+    values = list(struct.unpack_from(f'<{rows * cols}d', buffer, offset))
+    offset += rows * cols * 8
+    if tag == b'm':
+        values = [values[i * cols:(i + 1) * cols] for i in range(rows)]
+    return values, offset
+
+
+def dumps(snapshot):
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, int(snapshot['mts'])),
+        _pack_string(snapshot['trade_pair']),
+        _pack_string(snapshot['time_frame']),
+        _STATE.pack(*snapshot['state']),
+        _COUNT.pack(len(snapshot['indicators']))
+    ]
+    for name, fields in snapshot['indicators'].items():
+        parts.append(_pack_string(name))
+        parts.append(_COUNT.pack(len(fields)))
+        for key, value in fields.items():
+            parts.append(_pack_string(key))
+            parts.append(_pack_field(value))
+    return b''.join(parts)
+
+
+def loads(buffer):
+    magic, version, mts = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'Not a checkpoint of version {VERSION}')
+    offset = _HEADER.size
+    trade_pair, offset = _unpack_string(buffer, offset)
+    time_frame, offset = _unpack_string(buffer, offset)
+    state = _STATE.unpack_from(buffer, offset)
+    offset += _STATE.size
+    (count,) = _COUNT.unpack_from(buffer, offset)
+    offset += _COUNT.size
+    indicators = {}
+    for _ in range(count):
+        name, offset = _unpack_string(buffer, offset)
+        (field_count,) = _COUNT.unpack_from(buffer, offset)
+        offset += _COUNT.size
+        fields = {}
+        for _ in range(field_count):
+            key, offset = _unpack_string(buffer, offset)
+            fields[key], offset = _unpack_field(buffer, offset)
+        indicators[name] = fields
+    return {'mts': mts, 'trade_pair': trade_pair, 'time_frame': time_frame, 'state': state, 'indicators': indicators}
+
+
+def save(filename, snapshot):
+    # Written next to the target and renamed over it, so a crash never leaves a half written checkpoint.
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as file:
+        file.write(dumps(snapshot))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_filename, filename)
+
+
+def load(filename):
+    try:
+        with open(filename, 'rb') as file:
+            return loads(file.read())
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
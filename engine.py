@@ -1,28 +1,103 @@
+import asyncio
+import checkpoint
+import orderbook
+import shadow
 import state
 import strategy
 import candlestick
 import view
-import pandas as pd
+import time
 from exchange import OrderSide
 
 
 class Engine(object):
     TOLERANCE = 0.02
     INVESTMENT_PERC = 0.25
+    MAX_SLIPPAGE = 0.002
+    CHECKPOINT_INTERVAL = 60  # 60S
 
-    def __init__(self, trade_pair, time_frame, size=500):
+    def __init__(self, trade_pair, time_frame, size=500, extrema_window=None, batch_orders=False,
+                 account_max_age=None):
         self.trade_pair = trade_pair
+        self.time_frame = time_frame
         self.size = size
-        self.state = state.State(trade_pair, time_frame)
+        self.checkpoint_file = f'checkpoint_{trade_pair}_{time_frame}.bin'
+        self._last_checkpoint = 0.0
+        self.state = state.State(trade_pair, time_frame, extrema_window, batch_orders, account_max_age)
         self.history = candlestick.CandleHistory(trade_pair, time_frame, size)
         self.stgy1 = strategy.StrategyOne()
         self.stgy2 = strategy.StrategyTwo()
+        self.shadows = []
+        self.shadow_records = []
+
+    async def warm_up_async(self):
+        # Constructors do no I/O, the first fetch of state and history happens here and both run concurrently.
+        await asyncio.gather(asyncio.to_thread(self.state.warm_up), asyncio.to_thread(self.history.update))
+        self.resume()
+
+    def snapshot(self):
+        indicators = {}
+        for prefix, stgy in (('stgy1', self.stgy1), ('stgy2', self.stgy2)):
+            for name, indicator_state in stgy.get_state().items():
+                indicators[f'{prefix}.{name}'] = indicator_state
+        return {
+            'mts': self.state.mts,
+            'trade_pair': self.trade_pair,
+            'time_frame': self.time_frame,
+            'state': (self.state.peak_price, self.state.bottom_price, self.state.pl_high_perc),
+            'indicators': indicators
+        }
+
+    def resume(self):
+        snapshot = checkpoint.load(self.checkpoint_file)
+        if snapshot is None or snapshot['trade_pair'] != self.trade_pair or snapshot['time_frame'] != self.time_frame:
+            return False
+
+        # Trailing fields keep the extremes seen before the restart, together with what was fetched after it.
+        peak_price, bottom_price, pl_high_perc = snapshot['state']
+        self.state.peak_price = max(self.state.peak_price, peak_price)
+        self.state.bottom_price = min(self.state.bottom_price, bottom_price)
+        self.state.pl_high_perc = max(self.state.pl_high_perc, pl_high_perc)
+
+        for prefix, stgy in (('stgy1', self.stgy1), ('stgy2', self.stgy2)):
+            stgy.set_state({name.split('.', 1)[1]: indicator_state
+                            for name, indicator_state in snapshot['indicators'].items()
+                            if name.startswith(prefix + '.')})
+        return True
+
+    def save_checkpoint(self, force=False):
+        now = time.time()
+        if force or now - self._last_checkpoint >= Engine.CHECKPOINT_INTERVAL:
+            checkpoint.save(self.checkpoint_file, self.snapshot())
+            self._last_checkpoint = now
 
     def loop_once(self):
+        self.fetch()
+        report = self.route(*self.evaluate())
+        self.shadow_tick()
+        return report
+
+    def fetch(self):
         self.history.update()
         self.state.update()
+
+    def evaluate(self):
         result_one = self.stgy1.think(self.history, int(self.size / 2))
         result_two = self.stgy2.think(self.history, int(self.size / 2))
+        return result_one, result_two
+
+    def add_shadow(self, name, stgy, **kwargs):
+        self.shadows.append(shadow.ShadowStrategy(name, stgy, **kwargs))
+
+    def shadow_tick(self):
+        # Shadows read the same history after the live strategies, indicators with the same parameters are reused.
+        records = []
+        for s in self.shadows:
+            records += s.tick(self.history, int(self.size / 2), self.state.last_price)
+        self.shadow_records = records
+        return records
+
+    def route(self, result_one, result_two):
         report = view.ReportView()
         self.report_update(report)
 
@@ -40,11 +115,16 @@ class Engine(object):
         if self.state.position and self.state.pl_perc <= -Engine.TOLERANCE:
             self.release_position('release', report)
 
+        self.save_checkpoint()
         return report
 
     def adjust_position(self, action, report):
         position = self.check_position()
         amount = self.state.balance.total_usd / self.state.last_price * Engine.INVESTMENT_PERC
+        amount = self.cap_slippage(action, position, amount)
+        if amount <= 0 and position == 'no-position':
+            # The book leaves no room for a new position, nothing is sent nor registered.
+            return
         if action == 'buy' and position == 'no-position':
             self.buy(amount)
             report.action_register(action, position)
@@ -60,6 +140,20 @@ class Engine(object):
             self.buy(amount)
             report.action_register(action, position)
 
+    def cap_slippage(self, action, position, amount):
+        # The part that closes an opposite position always goes through, only the new exposure is capped.
+        # Sized from a REST snapshot fetched per order (last_book), not from a book kept up to date by updates.
+        # Without a book no new exposure is taken, the closing part is still sent uncapped.
+        closing = 0.0
+        if (action == 'buy' and position == 'short-position') or (action == 'sell' and position == 'long-position'):
+            closing = abs(float(self.state.position.amount))
+        try:
+            book = orderbook.OrderBook.last_book(self.trade_pair)
+        except Exception:
+            return 0.0
+        available = book.max_size(action, Engine.MAX_SLIPPAGE) - closing
+        return max(0.0, min(amount, available))
+
     def release_position(self, action, report):
         position = self.check_position()
         if position == 'long-position':
@@ -89,44 +183,54 @@ class Engine(object):
             return 'no-position'
 
     def report_update(self, report):
+        # Only cheap scalars are copied here, everything derived is bound lazily and computed on first read.
         report.trade_pair = self.trade_pair
 
         if self.state.position:
-            report.base = float(self.state.position.base)
-            report.amount = float(self.state.position.amount)
-            report.pl = float(self.state.position.pl)
-            report.pl_perc = float(self.state.pl_perc)
-            report.pl_high_perc = float(self.state.pl_high_perc)
+            position = self.state.position
+            report.bind('base', lambda: float(position.base))
+            report.bind('amount', lambda: float(position.amount))
+            report.pl = self.state.pl
+            report.pl_perc = self.state.pl_perc
+            report.pl_high_perc = self.state.pl_high_perc
 
         total_available_usd = self.state.balance.total_available_usd
         total_usd = self.state.balance.total_usd
+        last_price = self.state.last_price
+        peak_price = self.state.peak_price
+        bottom_price = self.state.bottom_price
         max_leverage = 3.3
-        report.real_available_usd = total_usd * (1 - max_leverage) + total_available_usd * max_leverage
+        report.bind('real_available_usd',
+                    lambda: total_usd * (1 - max_leverage) + total_available_usd * max_leverage)
         report.total_usd = total_usd
-        report.last_price = self.state.last_price
-        report.peak_price = self.state.peak_price
-        report.peak_price_perc = self.state.last_price / self.state.peak_price if self.state.peak_price != 0 else 0
-        report.bottom_price = self.state.bottom_price
-        report.bottom_price_perc = self.state.last_price / self.state.bottom_price
-
-        stgy1_df = pd.DataFrame(self.stgy1.to_sheet())
-        f_ema = stgy1_df['fast_ema'].iloc[-1]
-        s_ema = stgy1_df['slow_ema'].iloc[-1]
-        report.fast_ema = f_ema
-        report.slow_ema = s_ema
-        report.ratio_ema = (f_ema - s_ema) / f_ema if f_ema > s_ema else (f_ema - s_ema) / s_ema
+        report.last_price = last_price
+        report.peak_price = peak_price
+        report.bind('peak_price_perc', lambda: last_price / peak_price if peak_price != 0 else 0)
+        report.bottom_price = bottom_price
+        report.bind('bottom_price_perc', lambda: last_price / bottom_price)
         report.daily_volume = self.state.daily_volume
 
-        stgy2_df = pd.DataFrame(self.stgy2.to_sheet())
-        report.fast_sma = stgy2_df['fast_sma'].iloc[-1]
-        report.mid_sma = stgy2_df['mid_sma'].iloc[-1]
-        report.slow_sma = stgy2_df['slow_sma'].iloc[-1]
-        report.basis = stgy2_df['basis'].iloc[-1]
-        report.upper = stgy2_df['upper'].iloc[-1]
-        report.lower = stgy2_df['lower'].iloc[-1]
-        report.rsi = stgy2_df['rsi'].iloc[-1]
-        report.rsi_change = stgy2_df['rsi'].iloc[-1] - stgy2_df['rsi'].iloc[-4]
-        report.kox = stgy2_df['kox'].iloc[-1]
+        stgy1_df = self.stgy1.snapshot()
+        report.bind('fast_ema', lambda: stgy1_df['fast_ema'].iloc[-1])
+        report.bind('slow_ema', lambda: stgy1_df['slow_ema'].iloc[-1])
+        report.bind('ratio_ema', lambda: Engine.ratio(report.fast_ema, report.slow_ema))
+
+        stgy2_df = self.stgy2.snapshot()
+        for name in ('fast_sma', 'mid_sma', 'slow_sma', 'basis', 'upper', 'lower', 'rsi', 'kox'):
+            report.bind(name, lambda column=name: stgy2_df[column].iloc[-1])
+        report.bind('rsi_change', lambda: stgy2_df['rsi'].iloc[-1] - stgy2_df['rsi'].iloc[-4])
+
+    @staticmethod
+    def ratio(f_ema, s_ema):
+        return (f_ema - s_ema) / f_ema if f_ema > s_ema else (f_ema - s_ema) / s_ema
+
+
+async def warm_up_all(engines):
+    await asyncio.gather(*(e.warm_up_async() for e in engines))
+
+
+def warm_up(engines):
+    asyncio.run(warm_up_all(engines))
 
 
 def main():
@@ -1,10 +1,10 @@
-import base64
-import hashlib
-import hmac
 import json
-import requests
-from datetime import datetime
+import ratelimit
+import signer
+import threading
+import transport
 from enum import Enum
+from nonce import NonceService
 
 
 class OrderSide(Enum):
@@ -24,6 +24,8 @@ class OrderType(Enum):
 
 
 class GenericRequest(object):
+    __slots__ = ('request', 'nonce', 'options')
+
     def __init__(self):
         self.request = ''
         self.nonce = ''
@@ -45,6 +47,8 @@ class BalanceResponseItem(object):
 
 
 class BalancesRequest(GenericRequest):
+    __slots__ = ()
+
     def __init__(self, nonce):
         super().__init__()
         self.nonce = nonce
@@ -85,6 +89,8 @@ class BalanceResponse(object):
 
 
 class OrderRequest(GenericRequest):
+    __slots__ = ('order_id',)
+
     def __init__(self, nonce, order_id):
         super().__init__()
         self.nonce = nonce
@@ -123,6 +129,8 @@ class OrderResponse(object):
 
 
 class NewOrderRequest(GenericRequest):
+    __slots__ = ('symbol', 'amount', 'price', 'side', 'type')
+
     def __init__(self, nonce, order_symbol, amount, price, order_side, order_type):
         super().__init__()
         self.nonce = nonce
@@ -147,6 +155,8 @@ class NewOrderResponse(OrderResponse):
 
 
 class ActiveOrdersRequest(GenericRequest):
+    __slots__ = ()
+
     def __init__(self, nonce):
         super().__init__()
         self.nonce = nonce
@@ -169,6 +179,8 @@ class ActiveOrdersResponse(object):
 
 
 class CancelOrderRequest(GenericRequest):
+    __slots__ = ('order_id',)
+
     def __init__(self, nonce, order_id):
         super().__init__()
         self.nonce = nonce
@@ -187,6 +199,74 @@ class CancelOrderResponse(OrderResponse):
         return order
 
 
+class MultiOrderRequest(GenericRequest):
+    __slots__ = ('orders',)
+
+    def __init__(self, nonce, orders):
+        super().__init__()
+        self.nonce = nonce
+        self.request = '/v1/order/new/multi'
+        self.orders = orders
+
+    @staticmethod
+    def order(order_symbol, amount, price, order_side, order_type):
+        return {
+            'symbol': order_symbol,
+            'amount': str(amount),
+            'price': str(price),
+            'exchange': 'bitfinex',
+            'side': order_side.value,
+            'type': order_type.value
+        }
+
+
+class MultiOrderResponse(object):
+    def __init__(self):
+        self.status = ''
+        self.orders_list = []
+
+    @staticmethod
+    def from_json(json_string):
+        multi_order_response = MultiOrderResponse()
+        data = json.loads(json_string)
+        multi_order_response.status = data.get('status', '')
+        for row in data.get('order_ids', []):
+            order = NewOrderResponse()
+            order.__dict__ = row
+            multi_order_response.orders_list.append(order)
+        return multi_order_response
+
+
+class CancelMultiOrderRequest(GenericRequest):
+    __slots__ = ('order_ids',)
+
+    def __init__(self, nonce, order_ids):
+        super().__init__()
+        self.nonce = nonce
+        self.order_ids = [int(order_id) for order_id in order_ids]
+        self.request = '/v1/order/cancel/multi'
+
+
+class CancelAllOrdersRequest(GenericRequest):
+    __slots__ = ()
+
+    def __init__(self, nonce):
+        super().__init__()
+        self.nonce = nonce
+        self.request = '/v1/order/cancel/all'
+
+
+class CancelMultiOrderResponse(object):
+    def __init__(self):
+        self.result = ''
+
+    @staticmethod
+    def from_json(json_string):
+        cancel_response = CancelMultiOrderResponse()
+        cancel_response.__dict__ = json.loads(json_string)
+        return cancel_response
+
+
 class PositionResponse(object):
     def __init__(self):
         self.id = ''
@@ -205,6 +285,8 @@ class PositionResponse(object):
 
 
 class ActivePositionsRequest(GenericRequest):
+    __slots__ = ()
+
     def __init__(self, nonce):
         super().__init__()
         self.nonce = nonce
@@ -227,35 +309,47 @@ class ActivePositionsResponse(object):
 
 
 class ExchangeApi(object):
-    def __init__(self, api_config):
-        self._epoch = datetime(1970, 1, 1)
-        self._nonce = 0
-        self._hash_maker = hmac.new(key=str(api_config[1]).encode('utf-8'), digestmod=hashlib.sha384)
+    _order_listeners = {}
+    _order_listeners_lock = threading.Lock()
+
+    def __init__(self, api_config, nonce=None):
+        self._nonce = nonce or NonceService.for_key(api_config[0])
+        self._signer = signer.RequestSigner(api_config[0], api_config[1])
         self._key = api_config[0]
 
     @property
     def nonce(self):
-        if self._nonce == 0:
-            self._nonce = int((datetime.now() - self._epoch).total_seconds()) * 1000
-        else:
-            self._nonce += 1
-        return str(self._nonce)
+        return self._nonce.next()
+
+    @property
+    def key(self):
+        return self._key
+
+    def on_order(self, listener):
+        # Listeners belong to the key, an order sent by any api instance on that key reaches all of them.
+        with ExchangeApi._order_listeners_lock:
+            listeners = ExchangeApi._order_listeners.setdefault(self._key, [])
+            if listener not in listeners:
+                listeners.append(listener)
+
+    def _notify_order(self, request):
+        for listener in list(ExchangeApi._order_listeners.get(self._key, ())):
+            listener(request)
+
+    @staticmethod
+    def priority(request):
+        if request.request.startswith('/v1/order') or request.request == '/v1/positions':
+            return ratelimit.Priority.HIGH
+        return ratelimit.Priority.LOW
 
     def send_request(self, request, method):
-        json_string = json.dumps(request.__dict__)
-        json_string64 = base64.b64encode(json_string.encode('utf-8'))
-        temp_hash_maker = self._hash_maker.copy()
-        temp_hash_maker.update(json_string64)
-        signature = temp_hash_maker.hexdigest()
-        url = 'https://api.bitfinex.com' + request.request
-        headers = {'X-BFX-APIKEY': self._key,
-                   'X-BFX-PAYLOAD': json_string64,
-                   'X-BFX-SIGNATURE': signature,
-                   'Content-Type': 'application/json'}
+        ratelimit.acquire(ratelimit.RateLimiter.AUTH, ExchangeApi.priority(request))
+        url, headers = self._signer.sign(request)
         try:
-            response = requests.request(method, url, headers=headers)
-        except Exception as e:
-            raise e
+            response = transport.request(method, url, headers)
+        finally:
+            if request.request.startswith(('/v1/order/new', '/v1/order/cancel')):
+                self._notify_order(request)
         return response
 
     def get_balances(self):
@@ -288,6 +382,88 @@ class ExchangeApi(object):
         # print(response.text)
         return ActivePositionsResponse.from_json(response.text)
 
+    def execute_orders(self, orders):
+        request = MultiOrderRequest(self.nonce, orders)
+        response = self.send_request(request, 'POST')
+        return MultiOrderResponse.from_json(response.text)
+
+    def cancel_order(self, order_id):
+        request = CancelOrderRequest(self.nonce, order_id)
+        response = self.send_request(request, 'POST')
+        return CancelOrderResponse.from_json(response.text)
+
+    def cancel_orders(self, order_ids):
+        request = CancelMultiOrderRequest(self.nonce, order_ids)
+        response = self.send_request(request, 'POST')
+        return CancelMultiOrderResponse.from_json(response.text)
+
+    def cancel_all_orders(self):
+        request = CancelAllOrdersRequest(self.nonce)
+        response = self.send_request(request, 'POST')
+        return CancelMultiOrderResponse.from_json(response.text)
+
+
+class OrderBatch(object):
+    MAX_ORDERS = 10
+
+    _batches = {}
+    _batches_lock = threading.Lock()
+
+    def __init__(self, api):
+        self._api = api
+        self._orders = []
+        self._cancels = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def for_api(api):
+        # One batch per key, every engine trading with the same key flushes its orders in the same request.
+        with OrderBatch._batches_lock:
+            batch = OrderBatch._batches.get(api.key)
+            if batch is None:
+                batch = OrderBatch._batches[api.key] = OrderBatch(api)
+            return batch
+
+    @staticmethod
+    def flush_all():
+        with OrderBatch._batches_lock:
+            batches = list(OrderBatch._batches.values())
+        responses, failures = [], []
+        for batch in batches:
+            batch_responses, batch_failures = batch.flush()
+            responses += batch_responses
+            failures += batch_failures
+        return responses, failures
+
+    def add(self, order_symbol, amount, price, order_side, order_type):
+        with self._lock:
+            self._orders.append(MultiOrderRequest.order(order_symbol, amount, price, order_side, order_type))
+
+    def cancel(self, order_id):
+        with self._lock:
+            self._cancels.append(order_id)
+
+    def __len__(self):
+        return len(self._orders) + len(self._cancels)
+
+    def flush(self):
+        with self._lock:
+            orders, self._orders = self._orders, []
+            cancels, self._cancels = self._cancels, []
+        # Cancels go first so the new orders never compete with the ones they replace.
+        chunks = [(self._api.cancel_orders, 'cancels', cancels)] if cancels else []
+        for i in range(0, len(orders), OrderBatch.MAX_ORDERS):
+            chunks.append((self._api.execute_orders, 'orders', orders[i:i + OrderBatch.MAX_ORDERS]))
+        # A failed chunk does not stop the others. It is reported, not requeued: the request may have reached the
+        # exchange anyway, and the engines decide again on the next tick from the refreshed account.
+        responses, failures = [], []
+        for send, kind, chunk in chunks:
+            try:
+                responses.append(send(chunk))
+            except Exception as e:
+                failures.append({kind: chunk, 'error': repr(e)})
+        return responses, failures
+
 
 def main():
     pass
@@ -0,0 +1,102 @@
+import importlib
+import startup
+
+np = startup.lazy_import('numpy')
+
+_pyarrow = {}
+
+
+def _pa(module='pyarrow'):
+    # pyarrow is optional, only this module needs it.
+    if module not in _pyarrow:
+        try:
+            _pyarrow[module] = importlib.import_module(module)
+        except ImportError:
+            raise ImportError('Arrow/Parquet export needs the pyarrow package, install it with pip install pyarrow') \
+                from None
+    return _pyarrow[module]
+
+
+def _array(values):
+    # Contiguous numpy columns are wrapped as they are, lists (indicator sheets) are converted once.
+    pa = _pa()
+    if isinstance(values, np.ndarray):
+        return pa.array(np.ascontiguousarray(values))
+    return pa.array(values)
+
+
+def _mts(values):
+    return _array(np.asarray(values, dtype=np.int64)).view(_pa().timestamp('ms'))
+
+
+def history_batch(candle_history, names=('mts', 'open', 'close', 'high', 'low', 'volume')):
+    arrays = [_mts(candle_history.column('mts')) if name == 'mts' else _array(candle_history.column(name))
+              for name in names]
+    metadata = {'trade_pair': candle_history.trade_pair, 'time_frame': candle_history.time_frame}
+    schema = _pa().schema([(name, array.type) for name, array in zip(names, arrays)], metadata=metadata)
+    return _pa().RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def sheet_batch(sheet, metadata=None):
+    names = list(sheet)
+    arrays = [_mts(sheet[name]) if name == 'mts' else _array(sheet[name]) for name in names]
+    schema = _pa().schema([(name, array.type) for name, array in zip(names, arrays)], metadata=metadata)
+    return _pa().RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def indicator_batch(ind, metadata=None):
+    # Read through results_view(), results_to_sheet() would deep copy the whole series first.
+    metadata = dict(metadata or {}, indicator=type(ind).__name__)
+    return sheet_batch(ind.results_view(), metadata)
+
+
+def frame_batch(df, metadata=None):
+    batch = _pa().RecordBatch.from_pandas(df, preserve_index=False)
+    if metadata:
+        batch = batch.replace_schema_metadata(dict(batch.schema.metadata or {}, **metadata))
+    return batch
+
+
+def journal_table(filename='log.jsonl'):
+    return _pa('pyarrow.json').read_json(filename)
+
+
+def _table(batches):
+    pa = _pa()
+    if isinstance(batches, (pa.Table, pa.RecordBatch)):
+        batches = [batches]
+    tables = [pa.Table.from_batches([b]) if isinstance(b, pa.RecordBatch) else b for b in batches]
+    return tables[0] if len(tables) == 1 else pa.concat_tables(tables)
+
+
+def write_ipc(filename, batches, stream=False):
+    # The file format (default) can be memory-mapped by readers, the stream format can be appended to a pipe.
+    pa = _pa()
+    table = _table(batches)
+    with pa.OSFile(filename, 'wb') as sink:
+        writer = pa.ipc.new_stream(sink, table.schema) if stream else pa.ipc.new_file(sink, table.schema)
+        with writer:
+            writer.write_table(table)
+
+
+def read_ipc(filename, stream=False):
+    pa = _pa()
+    source = pa.memory_map(filename, 'r')
+    reader = pa.ipc.open_stream(source) if stream else pa.ipc.open_file(source)
+    return reader.read_all()
+
+
+def write_parquet(filename, batches, compression='zstd'):
+    _pa('pyarrow.parquet').write_table(_table(batches), filename, compression=compression)
+
+
+def read_parquet(filename, columns=None):
+    return _pa('pyarrow.parquet').read_table(filename, columns=columns, memory_map=True)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import collections
+import startup
+
+np = startup.lazy_import('numpy')
+
+
+class RollingExtrema(object):
+    def __init__(self, window):
+        self._window = window
+        self._count = 0
+        self._max = collections.deque()
+        self._min = collections.deque()
+
+    @property
+    def window(self):
+        return self._window
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    def __len__(self):
+        return min(self._count, self._window)
+
+    def reset(self):
+        self._count = 0
+        self._max.clear()
+        self._min.clear()
+
+    def push(self, high, low=None):
+        # Monotonic deques: every value enters and leaves each deque once, so a push is O(1) amortized.
+        low = high if low is None else low
+        index = self._count
+        self._count += 1
+
+        while self._max and self._max[-1][1] <= high:
+            self._max.pop()
+        self._max.append((index, high))
+        while self._min and self._min[-1][1] >= low:
+            self._min.pop()
+        self._min.append((index, low))
+
+        expired = index - self._window
+        if self._max[0][0] <= expired:
+            self._max.popleft()
+        if self._min[0][0] <= expired:
+            self._min.popleft()
+
+
+def _rolling(values, window, pick, fill):
+    # van Herk/Gil-Werman: prefix and suffix scans inside blocks of the window size, two per output in total.
+    values = np.asarray(values, dtype=np.float64)
+    size = values.shape[-1]
+    lead = values.shape[:-1]
+    padded_size = -(-(size + window - 1) // window) * window
+    padded = np.full(lead + (padded_size,), fill)
+    padded[..., window - 1:window - 1 + size] = values
+
+    blocks = padded.reshape(lead + (padded_size // window, window))
+    prefix = pick.accumulate(blocks, axis=-1).reshape(lead + (padded_size,))
+    suffix = np.flip(pick.accumulate(np.flip(blocks, axis=-1), axis=-1), axis=-1).reshape(lead + (padded_size,))
+
+    # Window ending at i starts at i in padded coordinates and ends at i + window - 1.
+    starts = np.arange(size)
+    ends = starts + window - 1
+    return pick(suffix[..., starts], prefix[..., ends])
+
+
+def rolling_max(values, window):
+    # Value at i covers values[i - window + 1:i + 1], shorter at the start of the series.
+    return _rolling(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values, window):
+    return _rolling(values, window, np.minimum, np.inf)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,12 @@
+import collections
 import copy
+import extrema
 import math
-import numpy as np
-import pandas as pd
-import candlestick
+import startup
 from enum import Enum
 
+np = startup.lazy_import('numpy')
+
 
 class Source(Enum):
     HIGH = 'high'
@@ -24,12 +26,214 @@ class Indicator(object):
     def results_to_sheet(self):
         raise NotImplementedError()
 
+    def results_view(self):
+        # The sheet itself instead of a copy, for code that only reads it.
+        return next(value for name, value in vars(self).items() if name.endswith('_sheet'))
+
     def setup(self, **kwargs):
         raise NotImplementedError()
 
     def calculate(self, candle_history, response_size, source):
         raise NotImplementedError()
 
+    def get_state(self):
+        raise NotImplementedError()
+
+    def set_state(self, state):
+        raise NotImplementedError()
+
+
+class StreamingIndicator(Indicator):
+    def __init__(self):
+        self._response_size = 0
+        self._last_mts = None
+        self._state = None
+        self._prev_state = None
+
+    @property
+    def last_mts(self):
+        return self._last_mts
+
+    @property
+    def response_size(self):
+        return self._response_size
+
+    def _results(self):
+        raise NotImplementedError()
+
+    def _step(self, state, candle):
+        raise NotImplementedError()
+
+    def _stream_from(self, candle_history, response_size, state, prev_state):
+        self._response_size = response_size
+        self._last_mts = int(candle_history.column('mts')[-1])
+        self._state = state
+        self._prev_state = prev_state
+
+    def update(self, candle):
+        # O(1) step from the accumulators, a candle with the same mts as the last one replaces it.
+        replace = candle.mts == self._last_mts
+        if not replace:
+            self._prev_state = self._state
+        self._state, row = self._step(self._prev_state, candle)
+        self._last_mts = candle.mts
+        rows, sheet = self._results()
+        _push_row(rows, sheet, [candle.mts] + row, replace)
+        return row
+
+
+def _push_row(rows, sheet, row, replace):
+    if replace:
+        rows[-1] = row
+        for key, value in zip(sheet, row):
+            sheet[key][-1] = value
+    else:
+        # The deques are bounded to the response size, appending drops the oldest row.
+        rows.append(row)
+        for key, value in zip(sheet, row):
+            sheet[key].append(value)
+
+
+def _ring(sheet, response_size):
+    # Rows and sheet columns as fixed size windows, trimming the oldest row is O(1) instead of shifting a list.
+    rows = collections.deque((list(row) for row in zip(*sheet.values())), maxlen=response_size)
+    return rows, {key: collections.deque(values, maxlen=response_size) for key, values in sheet.items()}
+
+
+def _lists(sheet):
+    return {key: list(values) for key, values in sheet.items()}
+
+
+def _ema_step(w):
+    return lambda prev, value: (value - prev) * w + prev
+
+
+def _wilder_step(period):
+    return lambda prev, value: (prev * (period - 1) + value) / period
+
+
+def _seed(values, result, start, period):
+    # Summed in order like the scalar loops, so both paths give bit-identical results.
+    total_sum = np.zeros(values.shape[:-1]) if values.ndim > 1 else 0.0
+    for i in range(start, start + period):
+        total_sum = total_sum + values[..., i]
+    result[..., start + period - 1] = total_sum / period
+
+
+def _recurse(values, result, seed, step):
+    # Fills result after seed. Time is the last axis, every leading axis (e.g. pairs) advances in the same step.
+    size = values.shape[-1]
+    if values.ndim == 1:
+        prev = result[seed]
+        out = result.tolist()
+        for i, value in enumerate(values[seed + 1:].tolist(), seed + 1):
+            prev = step(prev, value)
+            out[i] = prev
+        result[:] = out
+    else:
+        by_time = np.moveaxis(values, -1, 0)
+        result_by_time = np.moveaxis(result, -1, 0)
+        prev = result_by_time[seed].copy()
+        for i in range(seed + 1, size):
+            prev = step(prev, by_time[i])
+            result_by_time[i] = prev
+    return result
+
+
+def _windows(values, period):
+    return np.lib.stride_tricks.sliding_window_view(values, period, axis=-1)
+
+
+def ema(values, period, start=0):
+    # Same convention as the indicators: SMA seed at start + period - 1, zeros before it.
+    values = np.asarray(values, dtype=np.float64)
+    result = np.zeros(values.shape)
+    seed = start + period - 1
+    if seed >= values.shape[-1]:
+        return result
+    _seed(values, result, start, period)
+    return _recurse(values, result, seed, _ema_step(2.0 / (period + 1.0)))
+
+
+def sma(values, period):
+    values = np.asarray(values, dtype=np.float64)
+    result = np.zeros(values.shape)
+    result[..., period - 1:] = _windows(values, period).sum(axis=-1) / period
+    return result
+
+
+def bb(values, period=20, mult=2):
+    values = np.asarray(values, dtype=np.float64)
+    basis = sma(values, period)
+    upper = np.zeros(values.shape)
+    lower = np.zeros(values.shape)
+    bandwidth = np.zeros(values.shape)
+
+    # Deviation over the window around each period's own SMA, bands start at 2 * (period - 1) like BBIndicator.
+    dev = ((_windows(values, period) - basis[..., period - 1:, None]) ** 2).sum(axis=-1)
+    first = 2 * (period - 1)
+    std_dev = np.sqrt(dev[..., first - (period - 1):] / period)
+    lower[..., first:] = basis[..., first:] - mult * std_dev
+    upper[..., first:] = basis[..., first:] + mult * std_dev
+    bandwidth[..., first:] = (upper[..., first:] - lower[..., first:]) / basis[..., first:] * 100
+    return basis, upper, lower, bandwidth
+
+
+def rsi(values, period=14):
+    # One value per price change, so the result is one shorter than the input along time.
+    values = np.asarray(values, dtype=np.float64)
+    change = values[..., 1:] - values[..., :-1]
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change > 0, 0.0, np.abs(change))
+    avg_gain = np.zeros(change.shape)
+    avg_loss = np.zeros(change.shape)
+    _seed(gain, avg_gain, 0, period)
+    _seed(loss, avg_loss, 0, period)
+    _recurse(gain, avg_gain, period - 1, _wilder_step(period))
+    _recurse(loss, avg_loss, period - 1, _wilder_step(period))
+
+    result = np.zeros(change.shape)
+    g = avg_gain[..., period:]
+    lo = avg_loss[..., period:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 100 - 100 / (1 + g / lo)
+    result[..., period:] = np.where(lo == 0, 100.0, np.where(g == 0, 0.0, value))
+    return result
+
+
+def macd(values, f1=12, f2=26, f3=9):
+    values = np.asarray(values, dtype=np.float64)
+    fast = ema(values, f1)
+    slow = ema(values, f2)
+    macd_arr = np.zeros(values.shape)
+    macd_arr[..., f2 - 1:] = fast[..., f2 - 1:] - slow[..., f2 - 1:]
+
+    # MACDIndicator seeds its signal with f3 + 1 values divided by f3, kept as is so both paths agree.
+    signal = np.zeros(values.shape)
+    seed = f2 - 1 + f3
+    total_sum = 0.0
+    for i in range(f2 - 1, f2 + f3):
+        total_sum = total_sum + macd_arr[..., i]
+    signal[..., seed] = total_sum / f3
+    _recurse(macd_arr, signal, seed, _ema_step(2.0 / (f3 + 1)))
+    return macd_arr, signal, macd_arr - signal
+
+
+def change_perc(values, start=0):
+    values = np.asarray(values, dtype=np.float64)
+    result = np.zeros(values.shape)
+    prev = values[..., start:-1]
+    curr = values[..., start + 1:]
+    np.divide((curr - prev) * 100.0, prev, out=result[..., start + 1:], where=prev != 0)
+    return result
+
+
+def diff(values, period, start=0):
+    values = np.asarray(values, dtype=np.float64)
+    result = np.zeros(values.shape)
+    result[..., start + period:] = values[..., start + period:] - values[..., start:-period]
+    return result
+
 
 class EMAIndicator(Indicator):
     def __init__(self, f1=9):
@@ -725,6 +929,534 @@ class RSIIndicator(Indicator):
             self._rsi_sheet['rsi'].append(rsi_arr[curr])
 
 
+class DonchianIndicator(Indicator):
+    def __init__(self, f1=20):
+        self._f1 = f1
+        self._donchian = []
+        self._donchian_sheet = {
+            'mts': [],
+            'upper': [],
+            'basis': [],
+            'lower': []
+        }
+
+    def results_to_json(self):
+        return str(self._donchian_sheet).replace('\'', '"')
+
+    def results_to_sheet(self):
+        return copy.deepcopy(self._donchian_sheet)
+
+    def setup(self, **kwargs):
+        self._f1 = kwargs.get('f1')
+
+    def calculate(self, candle_history, response_size, source=None):
+        size = candle_history.size
+
+        # Calculation of the channel, highest high and lowest low of the last f1 candles
+        upper_arr = np.zeros(size)
+        lower_arr = np.zeros(size)
+        upper_arr[self._f1 - 1:] = extrema.rolling_max(candle_history.column('high'), self._f1)[self._f1 - 1:]
+        lower_arr[self._f1 - 1:] = extrema.rolling_min(candle_history.column('low'), self._f1)[self._f1 - 1:]
+        basis_arr = (upper_arr + lower_arr) / 2
+
+        # Clear Lists & Summary
+        self._donchian_sheet = {
+            'mts': candle_history.column('mts')[size - response_size:].tolist(),
+            'upper': upper_arr[size - response_size:].tolist(),
+            'basis': basis_arr[size - response_size:].tolist(),
+            'lower': lower_arr[size - response_size:].tolist()
+        }
+        self._donchian = [list(row) for row in zip(*self._donchian_sheet.values())]
+
+
+class StochasticIndicator(StreamingIndicator):
+    def __init__(self, f1=14, f2=3):
+        super().__init__()
+        self._f1 = f1
+        self._f2 = f2
+        self._source = Source.CLOSE
+        self._stochastic = []
+        self._stochastic_sheet = {
+            'mts': [],
+            'k': [],
+            'd': []
+        }
+
+    def results_to_json(self):
+        return str(_lists(self._stochastic_sheet)).replace('\'', '"')
+
+    def results_to_sheet(self):
+        return _lists(self._stochastic_sheet)
+
+    def setup(self, **kwargs):
+        self._f1 = kwargs.get('f1')
+        self._f2 = kwargs.get('f2')
+
+    def calculate(self, candle_history, response_size, source=Source.CLOSE):
+        size = candle_history.size
+        values = candle_history.column(source.value)
+        high = candle_history.column('high')
+        low = candle_history.column('low')
+
+        # Calculation of %K, position of the source inside the f1 candles high/low range
+        highest = extrema.rolling_max(high, self._f1)
+        lowest = extrema.rolling_min(low, self._f1)
+        k_arr = np.zeros(size)
+        start = self._f1 - 1
+        span = highest[start:] - lowest[start:]
+        np.divide((values[start:] - lowest[start:]) * 100.0, span, out=k_arr[start:], where=span != 0)
+
+        # Calculation of %D, SMA of %K
+        d_arr = np.zeros(size)
+        d_arr[start:] = sma(k_arr[start:], self._f2)
+
+        # Streaming state: the last f1 highs/lows and f2 %K values, before and after the last candle
+        self._source = source
+        f1, f2 = self._f1, self._f2
+        self._stream_from(candle_history, response_size,
+                          (tuple(high[-f1:].tolist()), tuple(low[-f1:].tolist()), tuple(k_arr[-f2:].tolist())),
+                          (tuple(high[-f1 - 1:-1].tolist()), tuple(low[-f1 - 1:-1].tolist()),
+                           tuple(k_arr[-f2 - 1:-1].tolist())))
+
+        # Clear Lists & Summary
+        self._stochastic_sheet = {
+            'mts': candle_history.column('mts')[size - response_size:].tolist(),
+            'k': k_arr[size - response_size:].tolist(),
+            'd': d_arr[size - response_size:].tolist()
+        }
+        self._stochastic, self._stochastic_sheet = _ring(self._stochastic_sheet, response_size)
+
+    def _results(self):
+        return self._stochastic, self._stochastic_sheet
+
+    def _step(self, state, candle):
+        highs, lows, ks = state
+        highs = (highs + (candle.high,))[-self._f1:]
+        lows = (lows + (candle.low,))[-self._f1:]
+        highest, lowest = max(highs), min(lows)
+        value = getattr(candle, self._source.value)
+        k = (value - lowest) * 100.0 / (highest - lowest) if highest != lowest else 0.0
+        ks = (ks + (k,))[-self._f2:]
+        return (highs, lows, ks), [k, sum(ks) / self._f2]
+
+
+class ATRIndicator(StreamingIndicator):
+    def __init__(self, f1=14):
+        super().__init__()
+        self._f1 = f1
+        self._atr = []
+        self._atr_sheet = {
+            'mts': [],
+            'tr': [],
+            'atr': []
+        }
+
+    def results_to_json(self):
+        return str(_lists(self._atr_sheet)).replace('\'', '"')
+
+    def results_to_sheet(self):
+        return _lists(self._atr_sheet)
+
+    def setup(self, **kwargs):
+        self._f1 = kwargs.get('f1')
+
+    def calculate(self, candle_history, response_size, source=None):
+        size = candle_history.size
+        high = candle_history.column('high')
+        low = candle_history.column('low')
+        close = candle_history.column('close')
+
+        # Calculation of True Range, from the second candle on
+        tr_arr = np.zeros(size)
+        prev_close = close[:-1]
+        tr_arr[1:] = np.maximum(high[1:] - low[1:],
+                                np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+
+        # Calculation of ATR, Wilder's smoothing seeded with the SMA of the first f1 ranges
+        atr_arr = np.zeros(size)
+        _seed(tr_arr, atr_arr, 1, self._f1)
+        _recurse(tr_arr, atr_arr, self._f1, _wilder_step(self._f1))
+
+        self._stream_from(candle_history, response_size, (close[-1], atr_arr[-1]), (close[-2], atr_arr[-2]))
+
+        # Clear Lists & Summary
+        self._atr_sheet = {
+            'mts': candle_history.column('mts')[size - response_size:].tolist(),
+            'tr': tr_arr[size - response_size:].tolist(),
+            'atr': atr_arr[size - response_size:].tolist()
+        }
+        self._atr, self._atr_sheet = _ring(self._atr_sheet, response_size)
+
+    def _results(self):
+        return self._atr, self._atr_sheet
+
+    def _step(self, state, candle):
+        prev_close, atr = state
+        tr = max(candle.high - candle.low, abs(candle.high - prev_close), abs(candle.low - prev_close))
+        atr = (atr * (self._f1 - 1) + tr) / self._f1
+        return (candle.close, atr), [tr, atr]
+
+
+class OBVIndicator(StreamingIndicator):
+    def __init__(self):
+        super().__init__()
+        self._source = Source.CLOSE
+        self._obv = []
+        self._obv_sheet = {
+            'mts': [],
+            'obv': []
+        }
+
+    def results_to_json(self):
+        return str(_lists(self._obv_sheet)).replace('\'', '"')
+
+    def results_to_sheet(self):
+        return _lists(self._obv_sheet)
+
+    def setup(self, **kwargs):
+        pass
+
+    def calculate(self, candle_history, response_size, source=Source.CLOSE):
+        size = candle_history.size
+        values = candle_history.column(source.value)
+        volume = candle_history.column('volume')
+
+        # Calculation of On Balance Volume, volume added on up candles and subtracted on down candles
+        obv_arr = np.zeros(size)
+        obv_arr[1:] = np.cumsum(np.sign(values[1:] - values[:-1]) * volume[1:])
+
+        self._source = source
+        self._stream_from(candle_history, response_size, (values[-1], obv_arr[-1]), (values[-2], obv_arr[-2]))
+
+        # Clear Lists & Summary
+        self._obv_sheet = {
+            'mts': candle_history.column('mts')[size - response_size:].tolist(),
+            'obv': obv_arr[size - response_size:].tolist()
+        }
+        self._obv, self._obv_sheet = _ring(self._obv_sheet, response_size)
+
+    def _results(self):
+        return self._obv, self._obv_sheet
+
+    def _step(self, state, candle):
+        prev_value, obv = state
+        value = getattr(candle, self._source.value)
+        if value > prev_value:
+            obv += candle.volume
+        elif value < prev_value:
+            obv -= candle.volume
+        return (value, obv), [obv]
+
+
+class VWAPIndicator(StreamingIndicator):
+    SESSION = 86400000  # Sessions are UTC days.
+
+    def __init__(self):
+        super().__init__()
+        self._source = Source.HLC3
+        self._vwap = []
+        self._vwap_sheet = {
+            'mts': [],
+            'vwap': []
+        }
+
+    def results_to_json(self):
+        return str(_lists(self._vwap_sheet)).replace('\'', '"')
+
+    def results_to_sheet(self):
+        return _lists(self._vwap_sheet)
+
+    def setup(self, **kwargs):
+        pass
+
+    def calculate(self, candle_history, response_size, source=Source.HLC3):
+        size = candle_history.size
+        mts = candle_history.column('mts')
+        values = candle_history.column(source.value)
+        volume = candle_history.column('volume')
+
+        # Calculation of the cumulative price * volume and volume, restarted at every session
+        session = mts // VWAPIndicator.SESSION
+        starts = np.flatnonzero(np.r_[True, session[1:] != session[:-1]])
+        session_id = np.cumsum(np.r_[True, session[1:] != session[:-1]]) - 1
+        pv = values * volume
+        cum_pv = np.cumsum(pv)
+        cum_v = np.cumsum(volume)
+        cum_pv -= (cum_pv[starts] - pv[starts])[session_id]
+        cum_v -= (cum_v[starts] - volume[starts])[session_id]
+
+        # Calculation of VWAP, the source itself while the session has no volume
+        vwap_arr = values.copy()
+        np.divide(cum_pv, cum_v, out=vwap_arr, where=cum_v != 0)
+
+        self._source = source
+        prev_state = (int(session[-2]), cum_pv[-2], cum_v[-2]) if size > 1 else (None, 0.0, 0.0)
+        self._stream_from(candle_history, response_size, (int(session[-1]), cum_pv[-1], cum_v[-1]), prev_state)
+
+        # Clear Lists & Summary
+        self._vwap_sheet = {
+            'mts': mts[size - response_size:].tolist(),
+            'vwap': vwap_arr[size - response_size:].tolist()
+        }
+        self._vwap, self._vwap_sheet = _ring(self._vwap_sheet, response_size)
+
+    def _results(self):
+        return self._vwap, self._vwap_sheet
+
+    def _step(self, state, candle):
+        session, cum_pv, cum_v = state
+        if candle.mts // VWAPIndicator.SESSION != session:
+            session, cum_pv, cum_v = candle.mts // VWAPIndicator.SESSION, 0.0, 0.0
+        value = getattr(candle, self._source.value)
+        cum_pv += value * candle.volume
+        cum_v += candle.volume
+        return (session, cum_pv, cum_v), [cum_pv / cum_v if cum_v != 0 else value]
+
+
+class IchimokuIndicator(StreamingIndicator):
+    def __init__(self, f1=9, f2=26, f3=52):
+        super().__init__()
+        self._f1 = f1
+        self._f2 = f2
+        self._f3 = f3
+        self._ichimoku = []
+        self._ichimoku_sheet = {
+            'mts': [],
+            'tenkan': [],
+            'kijun': [],
+            'span_a': [],
+            'span_b': [],
+            'chikou': []
+        }
+
+    def results_to_json(self):
+        return str(_lists(self._ichimoku_sheet)).replace('\'', '"')
+
+    def results_to_sheet(self):
+        return _lists(self._ichimoku_sheet)
+
+    def setup(self, **kwargs):
+        self._f1 = kwargs.get('f1')
+        self._f2 = kwargs.get('f2')
+        self._f3 = kwargs.get('f3')
+
+    def _mid(self, high, low, period):
+        result = np.zeros(high.shape[-1])
+        mid = (extrema.rolling_max(high, period) + extrema.rolling_min(low, period)) / 2
+        result[period - 1:] = mid[period - 1:]
+        return result
+
+    def calculate(self, candle_history, response_size, source=None):
+        size = candle_history.size
+        high = candle_history.column('high')
+        low = candle_history.column('low')
+        close = candle_history.column('close')
+        f1, f2, f3 = self._f1, self._f2, self._f3
+
+        # Calculation of the conversion and base lines, middle of the f1 and f2 candles ranges
+        tenkan_arr = self._mid(high, low, f1)
+        kijun_arr = self._mid(high, low, f2)
+
+        # Calculation of the cloud, computed f2 candles ago and shown at the current one
+        lead_a_arr = np.where(kijun_arr != 0, (tenkan_arr + kijun_arr) / 2, 0.0)
+        lead_b_arr = self._mid(high, low, f3)
+        span_a_arr = np.zeros(size)
+        span_b_arr = np.zeros(size)
+        span_a_arr[f2:] = lead_a_arr[:-f2]
+        span_b_arr[f2:] = lead_b_arr[:-f2]
+
+        # The lagging line is the close itself, meant to be plotted f2 candles back
+        chikou_arr = close
+
+        def stream_state(end):
+            return (tuple(high[:end][-f3:].tolist()), tuple(low[:end][-f3:].tolist()),
+                    tuple(zip(lead_a_arr[:end][-(f2 + 1):].tolist(), lead_b_arr[:end][-(f2 + 1):].tolist())))
+
+        self._stream_from(candle_history, response_size, stream_state(size), stream_state(size - 1))
+
+        # Clear Lists & Summary
+        self._ichimoku_sheet = {
+            'mts': candle_history.column('mts')[size - response_size:].tolist(),
+            'tenkan': tenkan_arr[size - response_size:].tolist(),
+            'kijun': kijun_arr[size - response_size:].tolist(),
+            'span_a': span_a_arr[size - response_size:].tolist(),
+            'span_b': span_b_arr[size - response_size:].tolist(),
+            'chikou': chikou_arr[size - response_size:].tolist()
+        }
+        self._ichimoku, self._ichimoku_sheet = _ring(self._ichimoku_sheet, response_size)
+
+    def _results(self):
+        return self._ichimoku, self._ichimoku_sheet
+
+    def _step(self, state, candle):
+        highs, lows, leads = state
+        highs = (highs + (candle.high,))[-self._f3:]
+        lows = (lows + (candle.low,))[-self._f3:]
+        tenkan = (max(highs[-self._f1:]) + min(lows[-self._f1:])) / 2
+        kijun = (max(highs[-self._f2:]) + min(lows[-self._f2:])) / 2
+        lead_b = (max(highs) + min(lows)) / 2
+        leads = (leads + (((tenkan + kijun) / 2, lead_b),))[-(self._f2 + 1):]
+        span_a, span_b = leads[0]
+        return (highs, lows, leads), [tenkan, kijun, span_a, span_b, candle.close]
+
+
+class KOXIndicator(Indicator):
+    def __init__(self, f1=198, f2=8, f3=4):
+        self._f1 = f1
+        self._f2 = f2
+        self._f3 = f3
+        self._source = Source.CLOSE
+        self._response_size = 0
+        self._last_mts = None
+        self._ema = None
+        self._signal = None
+        self._prev_ema = None
+        self._prev_signal = None
+        self._signal_window = collections.deque(maxlen=f3 + 1)
+        self._kox = []
+        self._kox_sheet = {
+            'mts': [],
+            'ema': [],
+            'ema_change_perc': [],
+            'signal': [],
+            'roc': []
+        }
+
+    def results_to_json(self):
+        return str(_lists(self._kox_sheet)).replace('\'', '"')
+
+    def results_to_sheet(self):
+        return _lists(self._kox_sheet)
+
+    def setup(self, **kwargs):
+        self._f1 = kwargs.get('f1')
+        self._f2 = kwargs.get('f2')
+        self._f3 = kwargs.get('f3')
+        self._signal_window = collections.deque(maxlen=self._f3 + 1)
+
+    @property
+    def last_mts(self):
+        return self._last_mts
+
+    @property
+    def response_size(self):
+        return self._response_size
+
+    def get_state(self):
+        return {
+            'source': self._source.value,
+            'params': [self._f1, self._f2, self._f3, self._response_size, self._last_mts,
+                       self._ema, self._signal, self._prev_ema, self._prev_signal],
+            'window': list(self._signal_window),
+            'rows': list(self._kox)
+        }
+
+    def set_state(self, state):
+        params = state['params']
+        self._f1, self._f2, self._f3, self._response_size, self._last_mts = [int(p) for p in params[:5]]
+        self._ema, self._signal, self._prev_ema, self._prev_signal = params[5:]
+        self._source = Source(state['source'])
+        self._signal_window = collections.deque(state['window'], maxlen=self._f3 + 1)
+        rows = [[int(row[0])] + list(row[1:]) for row in state['rows']]
+        self._kox, self._kox_sheet = _ring({key: [row[i] for row in rows] for i, key in enumerate(self._kox_sheet)},
+                                           self._response_size)
+
+    def calculate(self, candle_history, response_size, source=Source.CLOSE):
+        size = candle_history.size
+        mts_arr = candle_history.column('mts')
+        values = candle_history.column(source.value)
+
+        # Calculation of the EMA, its change and the signal over the change
+        ema_arr = ema(values, self._f1)
+        ema_change_perc_arr = change_perc(ema_arr, self._f1 - 1)
+        signal_arr = ema(ema_change_perc_arr, self._f2, self._f1)
+
+        # Calculation of the Rate of Change of the signal
+        roc_arr = diff(signal_arr, self._f3, self._f1 + self._f2 - 1)
+
+        # Streaming state, so the next candles can be applied with update()
+        self._source = source
+        self._response_size = response_size
+        self._last_mts = int(mts_arr[-1])
+        self._ema = ema_arr[-1]
+        self._signal = signal_arr[-1]
+        self._prev_ema = ema_arr[-2]
+        self._prev_signal = signal_arr[-2]
+        self._signal_window = collections.deque(signal_arr[-(self._f3 + 1):].tolist(), maxlen=self._f3 + 1)
+
+        # Clear Lists
+        self._kox = []
+        self._kox_sheet = {
+            'mts': mts_arr[size - response_size:].tolist(),
+            'ema': ema_arr[size - response_size:].tolist(),
+            'ema_change_perc': ema_change_perc_arr[size - response_size:].tolist(),
+            'signal': signal_arr[size - response_size:].tolist(),
+            'roc': roc_arr[size - response_size:].tolist()
+        }
+
+        # Summary
+        self._kox, self._kox_sheet = _ring(self._kox_sheet, response_size)
+
+    def update(self, candle):
+        # O(1) step, a candle with the same mts as the last one replaces it instead of appending.
+        replace = candle.mts == self._last_mts
+        if replace:
+            self._signal_window.pop()
+        else:
+            self._prev_ema = self._ema
+            self._prev_signal = self._signal
+
+        value = getattr(candle, self._source.value)
+        w = 2.0 / (self._f1 + 1.0)
+        self._ema = (value - self._prev_ema) * w + self._prev_ema
+        ema_change_perc = (self._ema - self._prev_ema) / self._prev_ema * 100.0 if self._prev_ema != 0 else 0.0
+        w = 2.0 / (self._f2 + 1.0)
+        self._signal = (ema_change_perc - self._prev_signal) * w + self._prev_signal
+        self._signal_window.append(self._signal)
+        roc = self._signal - self._signal_window[0] if len(self._signal_window) > self._f3 else 0.0
+        self._last_mts = candle.mts
+
+        row = [candle.mts, self._ema, ema_change_perc, self._signal, roc]
+        _push_row(self._kox, self._kox_sheet, row, replace)
+        return row
+
+
+def batch_calculate(indicator, candle_histories, response_size, source=Source.CLOSE, **kwargs):
+    # One kernel call over a (pairs x time) matrix, histories must have the same size.
+    matrix = np.vstack([h.column(source.value) for h in candle_histories])
+    if indicator == 'ema':
+        columns = {'ema': ema(matrix, kwargs.get('f1', 9))}
+    elif indicator == 'sma':
+        columns = {'sma': sma(matrix, kwargs.get('f1', 9))}
+    elif indicator == 'rsi':
+        columns = {'rsi': rsi(matrix, kwargs.get('f1', 14))}
+    elif indicator == 'bb':
+        basis, upper, lower, bandwidth = bb(matrix, kwargs.get('f1', 20), kwargs.get('f2', 2))
+        columns = {'basis': basis, 'upper': upper, 'lower': lower, 'bandwidth': bandwidth}
+    elif indicator == 'macd':
+        macd_arr, signal, histogram = macd(matrix, kwargs.get('f1', 12), kwargs.get('f2', 26), kwargs.get('f3', 9))
+        columns = {'macd': macd_arr, 'signal': signal, 'histogram': histogram}
+    else:
+        raise KeyError(indicator)
+
+    sheets = []
+    for row, history in enumerate(candle_histories):
+        sheet = {'mts': history.column('mts')[-response_size:].tolist()}
+        for name, column in columns.items():
+            sheet[name] = column[row, -response_size:].tolist()
+        sheets.append(sheet)
+    return sheets
+
+
+def shared(candle_history, indicator_class, response_size, *args, source=Source.CLOSE):
+    # Calculated once per update for everybody asking with the same parameters, callers must not modify it.
+    def compute():
+        ind = indicator_class(*args)
+        ind.calculate(candle_history, response_size, source)
+        return ind
+    return candle_history.memo((indicator_class.__name__, response_size, source.value) + args, compute)
+
+
 def new_indicator(indicator):
     return {
         'ema': EMAIndicator(),
@@ -734,7 +1466,14 @@ def new_indicator(indicator):
         'sma': SMAIndicator(),
         'tsi': TSIIndicator(),
         'adx': ADXIndicator(),
-        'rsi': RSIIndicator()
+        'rsi': RSIIndicator(),
+        'kox': KOXIndicator(),
+        'donchian': DonchianIndicator(),
+        'stoch': StochasticIndicator(),
+        'atr': ATRIndicator(),
+        'obv': OBVIndicator(),
+        'vwap': VWAPIndicator(),
+        'ichimoku': IchimokuIndicator()
     }[indicator]
 
 
@@ -0,0 +1,126 @@
+import json
+import os
+import queue
+import threading
+import time
+
+
+class LogWriter(object):
+    BATCH_SIZE = 64
+    FLUSH_INTERVAL = 0.5
+    FSYNC_INTERVAL = 5.0
+
+    def __init__(self, filename='log.jsonl', max_bytes=10 * 1024 * 1024, backup_count=5, queue_size=1024):
+        self._filename = filename
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._last_fsync = 0.0
+        self._dropped = 0
+        self._written = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    @property
+    def written(self):
+        return self._written
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='LogWriter', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def write(self, kind, **fields):
+        record = {'ts': time.time(), 'kind': kind}
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Never block the caller, the trading loop is more important than the log.
+            self._dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        while not self._stop_event.is_set() or not self._queue.empty():
+            batch = self._drain()
+            if batch:
+                self._write_batch(batch)
+            elif self._file is not None and time.time() - self._last_fsync >= LogWriter.FSYNC_INTERVAL:
+                self._sync()
+        self._close()
+
+    def _drain(self):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=LogWriter.FLUSH_INTERVAL))
+            while len(batch) < LogWriter.BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, batch):
+        lines = ''.join(json.dumps(record, default=str) + '\n' for record in batch)
+        try:
+            self._open()
+            self._file.write(lines)
+            self._file.flush()
+            self._written += len(batch)
+            if time.time() - self._last_fsync >= LogWriter.FSYNC_INTERVAL:
+                self._sync()
+            if self._max_bytes and self._file.tell() >= self._max_bytes:
+                self._rotate()
+        except OSError:
+            self._dropped += len(batch)
+            self._close()
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self._filename, 'a', encoding='utf-8')
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.time()
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._sync()
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _rotate(self):
+        self._close()
+        for i in range(self._backup_count - 1, 0, -1):
+            source = f'{self._filename}.{i}'
+            if os.path.exists(source):
+                os.replace(source, f'{self._filename}.{i + 1}')
+        if self._backup_count > 0:
+            os.replace(self._filename, f'{self._filename}.1')
+        else:
+            os.remove(self._filename)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+import candlestick
+import multiprocessing
+import os
+import startup
+import time
+from multiprocessing import shared_memory
+
+np = startup.lazy_import('numpy')
+
+
+class MarketBuffer(object):
+    # Header: seq, count, capacity. Then mts and the five OHLCV columns of capacity rows, then the ticker fields.
+    HEADER = 3
+    # Attempts of view() and read() before giving up on a buffer that keeps changing or is stuck mid write.
+    READ_RETRIES = 1000
+    COLUMNS = ('mts', 'open', 'close', 'high', 'low', 'volume')
+    TICKER = ('bid', 'bid_size', 'ask', 'ask_size', 'daily_change', 'daily_change_perc', 'last_price', 'volume',
+              'high', 'low')
+
+    def __init__(self, shm, capacity, writable):
+        self._shm = shm
+        self.capacity = capacity
+        words = MarketBuffer.HEADER + len(MarketBuffer.COLUMNS) * capacity + len(MarketBuffer.TICKER)
+        raw = np.ndarray((words,), dtype=np.int64, buffer=shm.buf)
+        self._header = raw[:MarketBuffer.HEADER]
+        self._columns = {}
+        offset = MarketBuffer.HEADER
+        for name in MarketBuffer.COLUMNS:
+            dtype = np.int64 if name == 'mts' else np.float64
+            column = np.ndarray((capacity,), dtype=dtype, buffer=shm.buf, offset=offset * 8)
+            column.flags.writeable = writable
+            self._columns[name] = column
+            offset += capacity
+        self._ticker = np.ndarray((len(MarketBuffer.TICKER),), dtype=np.float64, buffer=shm.buf, offset=offset * 8)
+        self._ticker.flags.writeable = writable
+
+    @staticmethod
+    def name_for(trade_pair, time_frame, namespace):
+        # The namespace keeps two bots on the same host, or a test and a bot, off each other's segments.
+        return f'ascb_{namespace}_{trade_pair}_{time_frame}'
+
+    @staticmethod
+    def nbytes(capacity):
+        return (MarketBuffer.HEADER + len(MarketBuffer.COLUMNS) * capacity + len(MarketBuffer.TICKER)) * 8
+
+    @staticmethod
+    def create(trade_pair, time_frame, capacity, namespace):
+        name = MarketBuffer.name_for(trade_pair, time_frame, namespace)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=MarketBuffer.nbytes(capacity))
+        except FileExistsError:
+            raise FileExistsError(f'Shared memory segment {name} is already in use, stop its owner or remove it '
+                                  f'from /dev/shm') from None
+        buffer = MarketBuffer(shm, capacity, True)
+        buffer._header[:] = (0, 0, capacity)
+        return buffer
+
+    @staticmethod
+    def attach(trade_pair, time_frame, namespace, writable=False):
+        shm = shared_memory.SharedMemory(name=MarketBuffer.name_for(trade_pair, time_frame, namespace))
+        capacity = int(np.ndarray((MarketBuffer.HEADER,), dtype=np.int64, buffer=shm.buf)[2])
+        return MarketBuffer(shm, capacity, writable)
+
+    @property
+    def seq(self):
+        return int(self._header[0])
+
+    def write(self, history, ticker):
+        # Seqlock: odd while writing, readers retry or discard whatever they read across a change.
+        count = min(len(history.column('mts')), self.capacity)
+        self._header[0] += 1
+        for name, column in self._columns.items():
+            column[:count] = history.column(name)[-count:] if count else []
+        if ticker is not None:
+            self._ticker[:] = [getattr(ticker, name) for name in MarketBuffer.TICKER]
+        self._header[1] = count
+        self._header[0] += 1
+
+    def view(self):
+        # Zero copy: read-only views straight into the shared memory, validate the seq once done with them.
+        for _ in range(MarketBuffer.READ_RETRIES):
+            seq = self.seq
+            if seq % 2 == 0:
+                count = int(self._header[1])
+                return seq, {name: column[:count] for name, column in self._columns.items()}
+            time.sleep(0)
+        raise RuntimeError(f'Market buffer {self._shm.name} stayed locked by its writer')
+
+    def read(self):
+        # Consistent copy of the columns and the ticker.
+        for _ in range(MarketBuffer.READ_RETRIES):
+            seq, columns = self.view()
+            columns = {name: column.copy() for name, column in columns.items()}
+            ticker = candlestick.Ticker()
+            for name, value in zip(MarketBuffer.TICKER, self._ticker.tolist()):
+                setattr(ticker, name, value)
+            if self.seq == seq:
+                return seq, columns, ticker
+        raise RuntimeError(f'Market buffer {self._shm.name} changed on every read')
+
+    def close(self):
+        self._columns = {}
+        self._header = None
+        self._ticker = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+
+def _publish(trade_pairs, time_frame, size, interval, namespace, condition, stop_event):
+    buffers = {p: MarketBuffer.attach(p, time_frame, namespace, writable=True) for p in trade_pairs}
+    histories = {p: candlestick.CandleHistory(p, time_frame, size) for p in trade_pairs}
+    try:
+        while not stop_event.is_set():
+            start_time = time.time()
+            for trade_pair in trade_pairs:
+                try:
+                    histories[trade_pair].update()
+                    ticker = candlestick.Ticker.last_ticker(trade_pair)
+                except Exception:
+                    continue
+                buffers[trade_pair].write(histories[trade_pair], ticker)
+                with condition:
+                    condition.notify_all()
+            stop_event.wait(max(0.0, interval - (time.time() - start_time)))
+    finally:
+        for buffer in buffers.values():
+            buffer.close()
+
+
+class MarketDataPublisher(object):
+    def __init__(self, trade_pairs, time_frame, size=500, interval=60, namespace=None):
+        self.trade_pairs = list(trade_pairs)
+        self.time_frame = time_frame
+        self.size = size
+        self.interval = interval
+        self.namespace = namespace if namespace is not None else str(os.getpid())
+        self.condition = multiprocessing.Condition()
+        self._stop_event = multiprocessing.Event()
+        self._buffers = {}
+        self._process = None
+
+    def start(self):
+        # The buffers are owned here, so they outlive a crash of the fetcher and are unlinked on stop().
+        for trade_pair in self.trade_pairs:
+            self._buffers[trade_pair] = MarketBuffer.create(trade_pair, self.time_frame, self.size, self.namespace)
+        self._process = multiprocessing.Process(
+            target=_publish, name='MarketDataPublisher', daemon=True,
+            args=(self.trade_pairs, self.time_frame, self.size, self.interval, self.namespace, self.condition,
+                  self._stop_event))
+        self._process.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        if self._process is not None:
+            self._process.join(timeout)
+            self._process = None
+        for buffer in self._buffers.values():
+            buffer.close()
+            buffer.unlink()
+        self._buffers = {}
+
+    def subscriber(self, trade_pair):
+        return MarketDataSubscriber(trade_pair, self.time_frame, self.namespace, self.condition)
+
+
+class MarketDataSubscriber(object):
+    def __init__(self, trade_pair, time_frame, namespace, condition):
+        self.trade_pair = trade_pair
+        self.time_frame = time_frame
+        self.namespace = namespace
+        self._condition = condition
+        self._buffer = None
+        self._last_seq = 0
+
+    @property
+    def buffer(self):
+        # Attached lazily, so the subscriber can be pickled into a strategy process before it maps anything.
+        if self._buffer is None:
+            self._buffer = MarketBuffer.attach(self.trade_pair, self.time_frame, self.namespace)
+        return self._buffer
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_buffer'] = None
+        return state
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self.buffer.seq <= self._last_seq or self.buffer.seq % 2:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def history(self):
+        return SharedCandleHistory(self)
+
+    def mark(self, seq):
+        self._last_seq = seq
+
+
+class SharedCandleHistory(candlestick.CandleHistory):
+    def __init__(self, subscriber):
+        super().__init__(subscriber.trade_pair, subscriber.time_frame, 0)
+        self._subscriber = subscriber
+        self._seq = -1
+
+    @property
+    def candles(self):
+        self._materialize()
+        return super().candles
+
+    def since(self, mts):
+        self._materialize()
+        return super().since(mts)
+
+    def to_sheet(self):
+        self._materialize()
+        return super().to_sheet()
+
+    def _materialize(self):
+        # Candle objects only for the indicators still looping over them, built once per update.
+        if self._candle_list or not self._size:
+            return
+        columns = [self._columns[name].tolist() for name in MarketBuffer.COLUMNS]
+        for mts, open_, close, high, low, volume in zip(*columns):
+            candle = candlestick.Candle()
+            candle.mts = mts
+            candle.open = open_
+            candle.close = close
+            candle.high = high
+            candle.low = low
+            candle.volume = volume
+            self._candle_list.append(candle)
+
+    def column(self, name):
+        if name not in self._columns:
+            # Derived sources are computed from the shared columns, the base ones are never copied.
+            c = self._columns
+            column = {
+                'hl2': lambda: (c['high'] + c['low']) / 2,
+                'hlc3': lambda: (c['high'] + c['low'] + c['close']) / 3,
+                'ohlc4': lambda: (c['open'] + c['high'] + c['low'] + c['close']) / 4
+            }[name]()
+            column.flags.writeable = False
+            self._columns[name] = column
+        return self._columns[name]
+
+    def update(self):
+        self._seq, columns = self._subscriber.buffer.view()
+        self._subscriber.mark(self._seq)
+        self._columns = dict(columns)
+        self._size = len(columns['mts'])
+        self._candle_list = []
+
+    def is_consistent(self):
+        # False when the publisher wrote while the views were in use, the results computed from them are stale.
+        return self._subscriber.buffer.seq == self._seq
+
+    def compute(self, function):
+        # function(self) over views that were not written to meanwhile, recomputed on the new data otherwise.
+        for _ in range(MarketBuffer.READ_RETRIES):
+            self.update()
+            result = function(self)
+            if self.is_consistent():
+                return result
+        raise RuntimeError(f'Market data for {self.trade_pair} changed on every computation')
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
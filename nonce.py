@@ -0,0 +1,68 @@
+import hashlib
+import os
+import threading
+import time
+
+
+class NonceService(object):
+    RESERVE = 10000000  # 10S worth of microseconds handed out before touching the disk again.
+    DIRECTORY = '.'
+
+    _services = {}
+    _services_lock = threading.Lock()
+
+    def __init__(self, filename=None):
+        self._lock = threading.Lock()
+        self._filename = filename
+        self._ceiling = self._load()
+        self._nonce = max(NonceService.clock(), self._ceiling)
+
+    @staticmethod
+    def clock():
+        return time.time_ns() // 1000
+
+    @staticmethod
+    def for_key(key):
+        # Every ExchangeApi using the same key must draw from the same sequence or the exchange rejects the calls.
+        with NonceService._services_lock:
+            service = NonceService._services.get(key)
+            if service is None:
+                digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()[:16]
+                service = NonceService(os.path.join(NonceService.DIRECTORY, f'.nonce_{digest}'))
+                NonceService._services[key] = service
+            return service
+
+    def next(self):
+        with self._lock:
+            self._nonce = max(self._nonce + 1, NonceService.clock())
+            if self._nonce >= self._ceiling:
+                self._store(self._nonce + NonceService.RESERVE)
+            return str(self._nonce)
+
+    def _load(self):
+        if self._filename is None:
+            return 0
+        try:
+            with open(self._filename, 'r') as file:
+                return int(file.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _store(self, ceiling):
+        self._ceiling = ceiling
+        if self._filename is None:
+            return
+        temp_filename = self._filename + '.tmp'
+        with open(temp_filename, 'w') as file:
+            file.write(str(ceiling))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self._filename)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
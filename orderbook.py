@@ -0,0 +1,138 @@
+import bisect
+import json
+import ratelimit
+import sys
+import transport
+
+
+class OrderBook(object):
+    URI = 'https://api.bitfinex.com/v2/book/t{0}/P0?len={1}'
+
+    def __init__(self, trade_pair=''):
+        self.trade_pair = trade_pair
+        # Both sides keep ascending prices with amounts in parallel lists: best bid is the last, best ask the first.
+        self._bid_prices = []
+        self._bid_amounts = []
+        self._ask_prices = []
+        self._ask_amounts = []
+
+    @property
+    def best_bid(self):
+        return self._bid_prices[-1] if self._bid_prices else None
+
+    @property
+    def best_ask(self):
+        return self._ask_prices[0] if self._ask_prices else None
+
+    @property
+    def mid_price(self):
+        if not self._bid_prices or not self._ask_prices:
+            return None
+        return (self._bid_prices[-1] + self._ask_prices[0]) / 2
+
+    def bids(self):
+        return list(zip(reversed(self._bid_prices), reversed(self._bid_amounts)))
+
+    def asks(self):
+        return list(zip(self._ask_prices, self._ask_amounts))
+
+    def clear(self):
+        self._bid_prices, self._bid_amounts = [], []
+        self._ask_prices, self._ask_amounts = [], []
+
+    def apply(self, price, count, amount):
+        # Bitfinex P0 semantics: count 0 removes the level, the sign of amount tells the side.
+        if amount > 0:
+            prices, amounts = self._bid_prices, self._bid_amounts
+        else:
+            prices, amounts = self._ask_prices, self._ask_amounts
+        i = bisect.bisect_left(prices, price)
+        found = i < len(prices) and prices[i] == price
+        if count == 0:
+            if found:
+                del prices[i]
+                del amounts[i]
+        elif found:
+            amounts[i] = abs(amount)
+        else:
+            prices.insert(i, price)
+            amounts.insert(i, abs(amount))
+
+    def apply_snapshot(self, rows):
+        self.clear()
+        for price, count, amount in rows:
+            self.apply(float(price), int(count), float(amount))
+
+    def _levels(self, side):
+        if side == 'buy':
+            return zip(self._ask_prices, self._ask_amounts)
+        return zip(reversed(self._bid_prices), reversed(self._bid_amounts))
+
+    def expected_fill_price(self, size, side):
+        remaining = size
+        cost = 0.0
+        for price, amount in self._levels(side):
+            take = amount if amount < remaining else remaining
+            cost += take * price
+            remaining -= take
+            if remaining <= 0:
+                return cost / size
+        return None
+
+    def max_size(self, side, max_slippage):
+        # Largest size whose average fill stays within max_slippage of the best price.
+        levels = list(self._levels(side))
+        if not levels:
+            return 0.0
+        best = levels[0][0]
+        limit = best * (1 + max_slippage) if side == 'buy' else best * (1 - max_slippage)
+        size = 0.0
+        cost = 0.0
+        for price, amount in levels:
+            # Average after taking x more at price: (cost + x * price) / (size + x) == limit.
+            if (side == 'buy' and price <= limit) or (side == 'sell' and price >= limit):
+                size += amount
+                cost += amount * price
+                continue
+            x = (limit * size - cost) / (price - limit)
+            return size + min(max(x, 0.0), amount)
+        return size
+
+    @staticmethod
+    def from_json(json_string, trade_pair=''):
+        book = OrderBook(trade_pair)
+        book.apply_snapshot(json.loads(json_string))
+        return book
+
+    @staticmethod
+    def last_book(trade_pair, length=100):
+        uri = OrderBook.URI.format(trade_pair, length)
+        ratelimit.acquire(ratelimit.RateLimiter.BOOK, ratelimit.Priority.HIGH)
+        response = transport.get(uri)
+        return OrderBook.from_json(response.content, trade_pair)
+
+    @staticmethod
+    def replay(filename, trade_pair=''):
+        # Recorded frames, one per line, either [chan_id, data] as sent by the websocket or bare data.
+        # Data holding a list of rows is a snapshot, a single row is an update.
+        book = OrderBook(trade_pair)
+        with open(filename, 'r') as file:
+            for line in file:
+                frame = json.loads(line)
+                data = frame[1] if len(frame) == 2 else frame
+                if data == 'hb' or not data:
+                    continue
+                if isinstance(data[0], list):
+                    book.apply_snapshot(data)
+                else:
+                    book.apply(float(data[0]), int(data[1]), float(data[2]))
+                yield book
+
+
+def main():
+    for book in OrderBook.replay(sys.argv[1]):
+        print(book.best_bid, book.best_ask, book.expected_fill_price(1.0, 'buy'), book.max_size('buy', 0.001))
+
+
+if __name__ == '__main__':
+    main()
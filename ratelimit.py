@@ -0,0 +1,125 @@
+import threading
+import time
+from enum import Enum
+
+
+class Priority(Enum):
+    HIGH = 0
+    LOW = 1
+
+
+class TokenBucket(object):
+    def __init__(self, requests_per_minute, burst=None, reserve_perc=0.25):
+        self._rate = requests_per_minute / 60.0
+        self._capacity = float(burst if burst is not None else requests_per_minute)
+        self._reserve = self._capacity * reserve_perc
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+        self._condition = threading.Condition()
+        self._high_waiting = 0
+        self._granted = {Priority.HIGH: 0, Priority.LOW: 0}
+        self._waited = 0
+        self._wait_time = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def _floor(self, priority):
+        # Low priority calls can never spend the reserve and always yield to a waiting high priority call.
+        if priority == Priority.HIGH:
+            return 0.0
+        return self._reserve if self._high_waiting == 0 else self._capacity
+
+    def acquire(self, priority=Priority.LOW, timeout=None):
+        start_time = time.monotonic()
+        with self._condition:
+            if priority == Priority.HIGH:
+                self._high_waiting += 1
+            try:
+                waited = False
+                while True:
+                    self._refill()
+                    floor = self._floor(priority)
+                    if self._tokens - 1.0 >= floor:
+                        self._tokens -= 1.0
+                        self._granted[priority] += 1
+                        break
+                    delay = (floor + 1.0 - self._tokens) / self._rate
+                    if timeout is not None:
+                        remaining = timeout - (time.monotonic() - start_time)
+                        if remaining <= 0:
+                            return False
+                        delay = min(delay, remaining)
+                    waited = True
+                    self._condition.wait(delay)
+            finally:
+                if priority == Priority.HIGH:
+                    self._high_waiting -= 1
+                    self._condition.notify_all()
+            if waited:
+                self._waited += 1
+                self._wait_time += time.monotonic() - start_time
+        return True
+
+    def metrics(self):
+        with self._condition:
+            self._refill()
+            return {
+                'capacity': self._capacity,
+                'tokens': self._tokens,
+                'usage_perc': 1.0 - self._tokens / self._capacity,
+                'granted_high': self._granted[Priority.HIGH],
+                'granted_low': self._granted[Priority.LOW],
+                'waited': self._waited,
+                'wait_time': self._wait_time
+            }
+
+
+class RateLimiter(object):
+    CANDLES = 'candles'
+    TICKER = 'ticker'
+    BOOK = 'book'
+    TRADES = 'trades'
+    AUTH = 'auth'
+
+    LIMITS = {
+        CANDLES: 30,
+        TICKER: 30,
+        BOOK: 30,
+        TRADES: 30,
+        AUTH: 60
+    }
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, limits=None):
+        self._buckets = {endpoint: TokenBucket(rpm) for endpoint, rpm in (limits or RateLimiter.LIMITS).items()}
+
+    @staticmethod
+    def shared():
+        # One limiter per process, the exchange counts requests per IP and per key, not per engine.
+        with RateLimiter._shared_lock:
+            if RateLimiter._shared is None:
+                RateLimiter._shared = RateLimiter()
+            return RateLimiter._shared
+
+    def acquire(self, endpoint, priority=Priority.LOW, timeout=None):
+        return self._buckets[endpoint].acquire(priority, timeout)
+
+    def metrics(self):
+        return {endpoint: bucket.metrics() for endpoint, bucket in self._buckets.items()}
+
+
+def acquire(endpoint, priority=Priority.LOW, timeout=None):
+    return RateLimiter.shared().acquire(endpoint, priority, timeout)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import json
+import os
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAGIC = b'ASCS'
+_COLUMN = struct.Struct('<H1sI')
+
+
+def _default(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def to_json(data):
+    return json.dumps(data, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def to_binary(sheet):
+    # Numeric columns as little endian float64, anything else as a JSON encoded list.
+    parts = [MAGIC, struct.pack('<H', len(sheet))]
+    for name, values in sheet.items():
+        values = values if isinstance(values, (list, tuple)) else [values]
+        name = name.encode('utf-8')
+        try:
+            data = struct.pack(f'<{len(values)}d', *values)
+            tag = b'd'
+        except (struct.error, TypeError):
+            data = to_json(list(values))
+            tag = b's'
+        parts.append(_COLUMN.pack(len(name), tag, len(data)) + name + data)
+    return b''.join(parts)
+
+
+class Snapshot(object):
+    def __init__(self, mts, sources):
+        self.mts = mts
+        self.created = time.time()
+        self._sources = sources
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def paths(self):
+        return sorted(self._sources)
+
+    def render(self, path, fmt):
+        # Each document is rendered once per tick by the first reader that asks for it, by the server threads only.
+        key = (path, fmt)
+        body = self._rendered.get(key)
+        if body is None:
+            source = self._sources.get(path)
+            if source is None:
+                return None
+            with self._lock:
+                body = self._rendered.get(key)
+                if body is None:
+                    data = source()
+                    body = to_binary(data) if fmt == 'bin' else to_json(data)
+                    self._rendered[key] = body
+        return body
+
+
+def _plain(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def build_snapshot(engines, reports):
+    # Runs on the trading thread: everything the server needs is copied out of the live engines and reports here,
+    # the server threads only serialize these copies.
+    pairs = [e.trade_pair for e in engines]
+    sources = {'/pairs': lambda: {'pairs': pairs}}
+    for e, report in zip(engines, reports):
+        pair = e.trade_pair
+        record = {name: _plain(value) for name, value in report.to_record().items()}
+        sheet = e.state.to_sheet() if e.state.balance is not None else {}
+        sheet = {name: [_plain(value) for value in values] for name, values in sheet.items()}
+        sources[f'/report/{pair}'] = lambda r=record: r
+        sources[f'/state/{pair}'] = lambda s=sheet: s
+        for name, stgy in (('stgy1', e.stgy1), ('stgy2', e.stgy2)):
+            frame = stgy.snapshot()
+            if frame is not None:
+                sources[f'/indicators/{pair}/{name}'] = lambda f=frame.copy(): f.to_dict('list')
+    return Snapshot(max((e.state.mts for e in engines), default=0), sources)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'ASCBSnapshot/1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        fmt = parse_qs(url.query).get('format', [None])[0]
+        if fmt is None:
+            fmt = 'bin' if 'application/octet-stream' in self.headers.get('Accept', '') else 'json'
+        snapshot = self.server.snapshot_server.snapshot
+        if snapshot is None:
+            return self._send(503, to_json({'error': 'no snapshot yet'}), 'json')
+        if url.path in ('', '/'):
+            return self._send(200, to_json({'mts': snapshot.mts, 'created': snapshot.created,
+                                            'paths': snapshot.paths()}), 'json')
+        body = snapshot.render(url.path, fmt)
+        if body is None:
+            return self._send(404, to_json({'error': f'unknown path {url.path}'}), 'json')
+        self._send(200, body, fmt)
+
+    def do_POST(self):
+        self._send(405, to_json({'error': 'read-only'}), 'json')
+
+    def _send(self, code, body, fmt):
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/octet-stream' if fmt == 'bin' else 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+
+class SnapshotServer(object):
+    def __init__(self, host='127.0.0.1', port=8765, unix_socket=None):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.snapshot = None
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        if self.unix_socket is not None:
+            if os.path.exists(self.unix_socket):
+                os.remove(self.unix_socket)
+            self._httpd = _UnixHTTPServer(self.unix_socket, _Handler)
+        else:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+            self._httpd.daemon_threads = True
+            self.port = self._httpd.server_address[1]
+        self._httpd.snapshot_server = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='SnapshotServer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+            self._thread.join()
+            if self.unix_socket is not None and os.path.exists(self.unix_socket):
+                os.remove(self.unix_socket)
+
+    def publish(self, engines, reports):
+        # Built here, then a plain reference swap: readers keep whichever snapshot they started with.
+        self.snapshot = build_snapshot(engines, reports)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
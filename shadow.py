@@ -0,0 +1,95 @@
+import time
+
+
+class PaperBroker(object):
+    FEE_PERC = 0.002
+
+    def __init__(self, balance_usd=1000.0, fee_perc=None):
+        self.balance_usd = balance_usd
+        self.fee_perc = PaperBroker.FEE_PERC if fee_perc is None else fee_perc
+        self.amount = 0.0
+        self.base = 0.0
+        self.realized_pl = 0.0
+        self.fees = 0.0
+        self.trades = 0
+
+    def fill(self, amount, price):
+        # Signed amount, filled at once at price. Closing part of a position realizes its P&L.
+        fee = abs(amount) * price * self.fee_perc
+        self.fees += fee
+        self.realized_pl -= fee
+        self.trades += 1
+        total = self.amount + amount
+        if self.amount and (self.amount > 0) != (amount > 0):
+            closed = min(abs(amount), abs(self.amount))
+            self.realized_pl += (price - self.base) * closed * (1 if self.amount > 0 else -1)
+            if total and (total > 0) != (self.amount > 0):
+                self.base = price
+        elif total:
+            self.base = (self.base * self.amount + price * amount) / total
+        self.amount = total if abs(total) >= 1e-12 else 0.0
+        if not self.amount:
+            self.base = 0.0
+
+    def unrealized_pl(self, price):
+        return (price - self.base) * self.amount
+
+    def pl_perc(self, price):
+        initial = self.base * abs(self.amount)
+        return self.unrealized_pl(price) / initial if initial else 0.0
+
+    def equity(self, price):
+        return self.balance_usd + self.realized_pl + self.unrealized_pl(price)
+
+
+class ShadowStrategy(object):
+    def __init__(self, name, stgy, balance_usd=1000.0, investment_perc=0.25, tolerance=0.02):
+        self.name = name
+        self.stgy = stgy
+        self.broker = PaperBroker(balance_usd)
+        self.investment_perc = investment_perc
+        self.tolerance = tolerance
+        self.last_code = 0
+        self.last_price = 0.0
+
+    def tick(self, history, response_size, price):
+        # Same rules as the live engine, filled on paper at the last price.
+        self.last_code = code = self.stgy.think(history, response_size)
+        self.last_price = price
+        broker = self.broker
+        actions = []
+        amount = broker.equity(price) / price * self.investment_perc
+        if code == 100 and broker.amount <= 0:
+            broker.fill(amount + abs(broker.amount), price)
+            actions.append('buy')
+        elif code == -100 and broker.amount >= 0:
+            broker.fill(-(amount + abs(broker.amount)), price)
+            actions.append('sell')
+
+        if broker.amount and (broker.pl_perc(price) >= self.tolerance * 2 or broker.pl_perc(price) <= -self.tolerance):
+            actions.append('achieved' if broker.pl_perc(price) > 0 else 'release')
+            broker.fill(-broker.amount, price)
+        return [self.record(action) for action in actions]
+
+    def record(self, action=None):
+        price = self.last_price
+        return {
+            'ts': time.time(),
+            'shadow': self.name,
+            'action': action,
+            'code': self.last_code,
+            'price': price,
+            'amount': self.broker.amount,
+            'realized_pl': self.broker.realized_pl,
+            'unrealized_pl': self.broker.unrealized_pl(price),
+            'equity': self.broker.equity(price),
+            'trades': self.broker.trades
+        }
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import json
+from exchange import ExchangeApi
+from nonce import NonceService
+
+
+class SimulatedResponse(object):
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(data)
+        self.content = self.text.encode('utf-8')
+
+
+class SimulatedExchangeApi(ExchangeApi):
+    FEE_PERC = 0.002
+
+    def __init__(self, api_config=('simulated', 'simulated'), balance_usd=1000.0, prices=None):
+        # Same signing path as the real api, only the transport is replaced, and nonces never touch the disk.
+        super().__init__(api_config, NonceService())
+        self.prices = dict(prices or {})
+        self.balance_usd = balance_usd
+        self.positions = {}
+        self.orders = {}
+        self.round_trips = 0
+        self._next_id = 1
+        self._handlers = {
+            '/v1/balances': self._balances,
+            '/v1/positions': self._positions,
+            '/v1/orders': self._orders,
+            '/v1/order/status': self._order_status,
+            '/v1/order/new': self._new_order,
+            '/v1/order/new/multi': self._new_orders,
+            '/v1/order/cancel': self._cancel_order,
+            '/v1/order/cancel/multi': self._cancel_orders,
+            '/v1/order/cancel/all': self._cancel_all
+        }
+
+    def send_request(self, request, method):
+        self._signer.sign(request)
+        self.round_trips += 1
+        handler = self._handlers.get(request.request)
+        if handler is None:
+            return SimulatedResponse({'message': 'Unknown request'}, 400)
+        response = SimulatedResponse(handler(request))
+        if request.request.startswith(('/v1/order/new', '/v1/order/cancel')):
+            self._notify_order(request)
+        return response
+
+    def _balances(self, request):
+        return [{'type': 'trading', 'currency': 'usd', 'amount': str(self.balance_usd),
+                 'available': str(self.balance_usd)}]
+
+    def _positions(self, request):
+        result = []
+        for symbol, (base, amount) in self.positions.items():
+            price = self.prices.get(symbol.upper(), base)
+            result.append({'id': 0, 'symbol': symbol, 'status': 'ACTIVE', 'base': str(base), 'amount': str(amount),
+                           'timestamp': '0', 'swap': '0.0', 'pl': str((price - base) * amount)})
+        return result
+
+    def _orders(self, request):
+        return [order for order in self.orders.values() if order['is_live']]
+
+    def _order_status(self, request):
+        return self.orders.get(int(request.order_id), {'message': 'No such order found.'})
+
+    def _new_order(self, request):
+        return self._place({'symbol': request.symbol, 'amount': request.amount, 'price': request.price,
+                            'side': request.side, 'type': request.type})
+
+    def _new_orders(self, request):
+        return {'order_ids': [self._place(order) for order in request.orders], 'status': 'success'}
+
+    def _cancel_order(self, request):
+        order = self.orders.get(int(request.order_id), {'message': 'No such order found.'})
+        if order.get('is_live'):
+            order['is_live'] = False
+            order['is_cancelled'] = True
+        return order
+
+    def _cancel_orders(self, request):
+        for order_id in request.order_ids:
+            order = self.orders.get(int(order_id))
+            if order is not None and order['is_live']:
+                order['is_live'] = False
+                order['is_cancelled'] = True
+        return {'result': 'Orders cancelled'}
+
+    def _cancel_all(self, request):
+        for order in self.orders.values():
+            if order['is_live']:
+                order['is_live'] = False
+                order['is_cancelled'] = True
+        return {'result': 'All orders cancelled'}
+
+    def _place(self, order):
+        # Market orders fill at once at the current price, the others stay live until cancelled.
+        order_id = self._next_id
+        self._next_id += 1
+        symbol = order['symbol'].lower()
+        amount = float(order['amount'])
+        price = self.prices.get(order['symbol'].upper(), float(order['price']))
+        market = order['type'] in ('market', 'exchange market')
+        result = {
+            'id': order_id, 'order_id': order_id, 'symbol': symbol, 'exchange': 'bitfinex',
+            'price': order['price'], 'avg_execution_price': str(price if market else 0.0), 'side': order['side'],
+            'type': order['type'], 'timestamp': '0', 'is_live': not market, 'is_cancelled': False,
+            'is_hidden': False, 'was_forced': False, 'original_amount': str(amount),
+            'executed_amount': str(amount if market else 0.0), 'remaining_amount': str(0.0 if market else amount)
+        }
+        self.orders[order_id] = result
+        if market:
+            self._fill(symbol, amount if order['side'] == 'buy' else -amount, price)
+        return result
+
+    def _fill(self, symbol, amount, price):
+        self.balance_usd -= abs(amount) * price * SimulatedExchangeApi.FEE_PERC
+        base, held = self.positions.get(symbol, (price, 0.0))
+        total = held + amount
+        if held and (held > 0) != (amount > 0):
+            # Closing part of the position realizes its P&L, the rest keeps the original base.
+            closed = min(abs(amount), abs(held))
+            self.balance_usd += (price - base) * closed * (1 if held > 0 else -1)
+            if total and (total > 0) != (held > 0):
+                base = price
+        elif total:
+            base = (base * held + price * amount) / total
+        if abs(total) < 1e-12:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = (base, total)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import importlib
+import threading
+import time
+
+
+_import_times = {}
+_phase_times = {}
+_lock = threading.Lock()
+_process_start = time.perf_counter()
+
+
+class LazyModule(object):
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    start_time = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _import_times[self._name] = time.perf_counter() - start_time
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_import(name):
+    # Heavy modules are only imported on first attribute access, which keeps them off the startup path.
+    return LazyModule(name)
+
+
+class phase(object):
+    def __init__(self, name):
+        self._name = name
+        self._start_time = 0.0
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _phase_times[self._name] = time.perf_counter() - self._start_time
+        return False
+
+
+def report():
+    lines = [f'Startup: {time.perf_counter() - _process_start:.3f}s since startup was imported']
+    for name, seconds in _phase_times.items():
+        lines.append(f' - phase  {name:<24} {seconds * 1000:>10.1f} ms')
+    for name, seconds in sorted(_import_times.items(), key=lambda item: -item[1]):
+        lines.append(f' - import {name:<24} {seconds * 1000:>10.1f} ms')
+    return '\n'.join(lines)
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
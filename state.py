@@ -1,14 +1,25 @@
 import candlestick as cs
 import config
+import extrema
 import sys
-from exchange import ExchangeApi, OrderType
+from account import AccountCache
+from exchange import ExchangeApi, OrderBatch, OrderType
 
 CONFIG_FILE = 'config.ini'
 
 
 class State(object):
-    def __init__(self, trade_pair, time_frame):
+    def __init__(self, trade_pair, time_frame, extrema_window=None, batch_orders=False, account_max_age=None):
         self._api = None
+        self._account = None
+        self._account_max_age = account_max_age
+        self._batch = None
+        self._batch_orders = batch_orders
+        # With a window, peak and bottom only look back that many bars instead of all the way to the last order.
+        self._extrema = extrema.RollingExtrema(extrema_window) if extrema_window else None
+        self._bar_mts = 0
+        self._bar_high = 0.0
+        self._bar_low = sys.maxsize
         self.balance = None
         self.trade_pair = trade_pair
         self.time_frame = time_frame
@@ -25,17 +36,26 @@ class State(object):
         self.curr_open_price = 0.0
         self.daily_volume = 0.0
 
+        self.pl = 0.0
         self.pl_perc = 0
         self.pl_high_perc = 0
 
-        self.setup_api()
-        self.update()
-
     def setup_api(self):
-        self._api = ExchangeApi(config.rescue(CONFIG_FILE, self.trade_pair))
+        self.use_api(ExchangeApi(config.rescue(CONFIG_FILE, self.trade_pair)))
+
+    def use_api(self, api):
+        self._api = api
+        if self._batch_orders:
+            self._batch = OrderBatch.for_api(self._api)
+        self._account = AccountCache.for_api(self._api, self._account_max_age)
+
+    def warm_up(self):
+        if self._api is None:
+            self.setup_api()
+        self.update()
 
     def update(self):
-        self.balance = self._api.get_balances()
+        self.balance = self._account.balance
         self.position = self.check_position()
 
         ticker = cs.Ticker.last_ticker(self.trade_pair)
@@ -50,6 +70,22 @@ class State(object):
         self.curr_open_price = candle.open
         self.daily_volume = ticker.volume
 
+        if self._extrema is not None:
+            self.update_trailing()
+        else:
+            self.update_extremes()
+
+        if self.position:
+            # The cached position may be minutes old, its P&L is marked to the last price instead of read from it.
+            base = float(self.position.base)
+            amount = abs(float(self.position.amount))
+            self.pl = (self.last_price - base) * float(self.position.amount)
+            initial = base * amount
+            self.pl_perc = self.pl / initial
+            if self.pl_high_perc < self.pl_perc:
+                self.pl_high_perc = self.pl_perc
+
+    def update_extremes(self):
         if self.last_price > self.peak_price:
             self.peak_price = self.last_price
 
@@ -62,27 +98,34 @@ class State(object):
         if self.curr_low_price < self.bottom_price:
             self.bottom_price = self.curr_low_price
 
-        if self.position:
-            base = float(self.position.base)
-            amount = abs(float(self.position.amount))
-            pl = float(self.position.pl)
-            initial = base * amount
-            self.pl_perc = pl / initial
-            if self.pl_high_perc < self.pl_perc:
-                self.pl_high_perc = self.pl_perc
+    def update_trailing(self):
+        # Extremes of the bar in progress are kept apart and pushed into the window once the bar closes.
+        if self.mts != self._bar_mts:
+            if self._bar_mts:
+                self._extrema.push(self._bar_high, self._bar_low)
+            self._bar_mts = self.mts
+            self._bar_high = 0.0
+            self._bar_low = sys.maxsize
+        self._bar_high = max(self._bar_high, self.last_price, self.curr_high_price)
+        self._bar_low = min(self._bar_low, self.last_price, self.curr_low_price)
+        self.peak_price = self._bar_high if self._extrema.max is None else max(self._extrema.max, self._bar_high)
+        self.bottom_price = self._bar_low if self._extrema.min is None else min(self._extrema.min, self._bar_low)
 
     def check_position(self):
-        positions = self._api.get_active_positions()
-        position = None
-        for p in positions.positions_list:
-            if p.symbol == self.trade_pair.lower():
-                position = p
-        return position
+        return self._account.position(self.trade_pair)
 
     def adjust_position(self, amount, side):
         self.peak_price = self.last_price
         self.bottom_price = self.last_price
-        self._api.execute_order(self.trade_pair, amount, self.last_price, side, OrderType.MARGIN_MARKET)
+        if self._extrema is not None:
+            self._extrema.reset()
+            self._bar_high = self.last_price
+            self._bar_low = self.last_price
+        if self._batch is not None:
+            # Sent by OrderBatch.flush_all() together with the orders of the other engines on this key.
+            self._batch.add(self.trade_pair, amount, self.last_price, side, OrderType.MARGIN_MARKET)
+        else:
+            self._api.execute_order(self.trade_pair, amount, self.last_price, side, OrderType.MARGIN_MARKET)
 
     def to_sheet(self):
         mts_list = []
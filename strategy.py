@@ -1,14 +1,30 @@
-import pandas as pd
 import indicator
+import startup
+
+np = startup.lazy_import('numpy')
+pd = startup.lazy_import('pandas')
 
 
 class Strategy(object):
     def to_sheet(self):
         raise NotImplementedError()
 
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+    def snapshot(self):
+        # think() replaces the frame instead of mutating it, so the reference stays valid after the next call.
+        return self._df
+
     def think(self, history, response):
         raise NotImplementedError()
 
+    def signals(self, history):
+        raise NotImplementedError()
+
 
 class StrategyOne(Strategy):
     def __init__(self):
@@ -23,17 +39,8 @@ class StrategyOne(Strategy):
         size = response
         code = 0
 
-        fast_ema_indicator = indicator.EMAIndicator(self._f1)
-        fast_ema_indicator.calculate(history, size)
-        fast_ema = pd.DataFrame(fast_ema_indicator.results_to_sheet())
-        fast_ema.rename(columns={'ema': 'fast_ema'}, inplace=True)
-
-        slow_ema_indicator = indicator.EMAIndicator(self._f2)
-        slow_ema_indicator.calculate(history, size)
-        slow_long = pd.DataFrame(slow_ema_indicator.results_to_sheet())
-        slow_long.rename(columns={'ema': 'slow_ema'}, inplace=True)
-
-        self._df = pd.merge(fast_ema, slow_long, on='mts')
+        # Every strategy with the same parameters reads the same frame, think() never modifies it.
+        self._df = history.memo(('StrategyOne', self._f1, self._f2, size), lambda: self._frame(history, size))
 
         if self._df['fast_ema'].iloc[-2] < self._df['slow_ema'].iloc[-2]:
             code = -50
@@ -45,6 +52,34 @@ class StrategyOne(Strategy):
                 code = -100
         return code
 
+    def _frame(self, history, size):
+        fast_ema_indicator = indicator.shared(history, indicator.EMAIndicator, size, self._f1)
+        fast_ema = pd.DataFrame(fast_ema_indicator.results_to_sheet())
+        fast_ema.rename(columns={'ema': 'fast_ema'}, inplace=True)
+
+        slow_ema_indicator = indicator.shared(history, indicator.EMAIndicator, size, self._f2)
+        slow_long = pd.DataFrame(slow_ema_indicator.results_to_sheet())
+        slow_long.rename(columns={'ema': 'slow_ema'}, inplace=True)
+
+        return pd.merge(fast_ema, slow_long, on='mts')
+
+    def signals(self, history):
+        # Code think() would return on each bar, from one pass over the whole history.
+        close = history.column('close')
+        fast = indicator.ema(close, self._f1)
+        slow = indicator.ema(close, self._f2)
+        prev_fast, prev_slow = fast[:-1], slow[:-1]
+        curr_fast, curr_slow = fast[1:], slow[1:]
+        codes = np.zeros(len(close), dtype=np.int64)
+        codes[1:] = np.select(
+            [(prev_fast < prev_slow) & (curr_fast > curr_slow),
+             prev_fast < prev_slow,
+             (prev_fast > prev_slow) & (curr_fast < curr_slow),
+             prev_fast > prev_slow],
+            [100, -50, -100, 50],
+            0)
+        return codes
+
 
 class StrategyTwo(Strategy):
     def __init__(self):
@@ -61,6 +96,7 @@ class StrategyTwo(Strategy):
         self._f8 = 8
         self._f9 = 4
 
+        self._kox = None
         self._df = None
 
     def to_sheet(self):
@@ -70,42 +106,63 @@ class StrategyTwo(Strategy):
         size = response
         code = 0
 
-        fast_sma_indicator = indicator.SMAIndicator(self._f1)
-        fast_sma_indicator.calculate(history, size)
+        key = ('StrategyTwo', self._f1, self._f2, self._f3, self._f4, self._f5, self._f6, size)
+        df = history.memo(key, lambda: self._frame(history, size))
+
+        kox = pd.DataFrame(self._kox_update(history, size).results_to_sheet())
+        kox.drop(['ema', 'ema_change_perc', 'signal'], axis=1, inplace=True)
+        kox.rename(columns={'roc': 'kox'}, inplace=True)
+
+        self._df = pd.merge(df, kox, on='mts')
+
+        return code
+
+    def _frame(self, history, size):
+        fast_sma_indicator = indicator.shared(history, indicator.SMAIndicator, size, self._f1)
         fast_sma = pd.DataFrame(fast_sma_indicator.results_to_sheet())
         fast_sma.rename(columns={'sma': 'fast_sma'}, inplace=True)
 
-        mid_sma_indicator = indicator.SMAIndicator(self._f2)
-        mid_sma_indicator.calculate(history, size)
+        mid_sma_indicator = indicator.shared(history, indicator.SMAIndicator, size, self._f2)
         mid_sma = pd.DataFrame(mid_sma_indicator.results_to_sheet())
         mid_sma.rename(columns={'sma': 'mid_sma'}, inplace=True)
 
-        slow_sma_indicator = indicator.SMAIndicator(self._f3)
-        slow_sma_indicator.calculate(history, size)
+        slow_sma_indicator = indicator.shared(history, indicator.SMAIndicator, size, self._f3)
         slow_sma = pd.DataFrame(slow_sma_indicator.results_to_sheet())
         slow_sma.rename(columns={'sma': 'slow_sma'}, inplace=True)
 
-        rsi_indicator = indicator.RSIIndicator(self._f4)
-        rsi_indicator.calculate(history, size)
+        rsi_indicator = indicator.shared(history, indicator.RSIIndicator, size, self._f4)
         rsi = pd.DataFrame(rsi_indicator.results_to_sheet())
 
-        bb_indicator = indicator.BBIndicator(self._f5, self._f6)
-        bb_indicator.calculate(history, size)
+        bb_indicator = indicator.shared(history, indicator.BBIndicator, size, self._f5, self._f6)
         bb = pd.DataFrame(bb_indicator.results_to_sheet())
 
-        kox_indicator = indicator.KOXIndicator(self._f7, self._f8, self._f9)
-        kox_indicator.calculate(history, size)
-        kox = pd.DataFrame(kox_indicator.results_to_sheet())
-        kox.drop(['ema', 'ema_change_perc', 'signal'], axis=1, inplace=True)
-        kox.rename(columns={'roc': 'kox'}, inplace=True)
-
-        self._df = pd.merge(fast_sma, mid_sma, on='mts')
-        self._df = pd.merge(self._df, slow_sma, on='mts')
-        self._df = pd.merge(self._df, rsi, on='mts')
-        self._df = pd.merge(self._df, bb, on='mts')
-        self._df = pd.merge(self._df, kox, on='mts')
-
-        return code
+        df = pd.merge(fast_sma, mid_sma, on='mts')
+        df = pd.merge(df, slow_sma, on='mts')
+        df = pd.merge(df, rsi, on='mts')
+        return pd.merge(df, bb, on='mts')
+
+    def signals(self, history):
+        return np.zeros(history.size, dtype=np.int64)
+
+    def _kox_update(self, history, size):
+        # KOX streams, only candles newer than the last one it saw are applied when it is still in the window.
+        if self._kox is not None and self._kox.response_size == size:
+            candles = history.since(self._kox.last_mts)
+            if candles is not None:
+                for candle in candles:
+                    self._kox.update(candle)
+                return self._kox
+        self._kox = indicator.KOXIndicator(self._f7, self._f8, self._f9)
+        self._kox.calculate(history, size)
+        return self._kox
+
+    def get_state(self):
+        return {'kox': self._kox.get_state()} if self._kox is not None else {}
+
+    def set_state(self, state):
+        if 'kox' in state:
+            self._kox = indicator.KOXIndicator(self._f7, self._f8, self._f9)
+            self._kox.set_state(state['kox'])
 
 
 def main():
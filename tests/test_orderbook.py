@@ -0,0 +1,56 @@
+import os
+import unittest
+from orderbook import OrderBook
+
+FRAMES = os.path.join(os.path.dirname(__file__), 'data', 'book_frames.jsonl')
+
+
+def replay_states():
+    # replay() yields the same book after every frame, what matters is read before the next one is applied.
+    return [(book.best_bid, book.best_ask, book.bids(), book.asks(),
+             book.expected_fill_price(2.0, 'buy'), book.expected_fill_price(3.0, 'sell'),
+             book.max_size('buy', 0.005), book.max_size('sell', 0.001)) for book in OrderBook.replay(FRAMES)]
+
+
+class OrderBookReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.states = replay_states()
+
+    def test_heartbeat_is_skipped(self):
+        self.assertEqual(len(self.states), 5)
+
+    def test_snapshot(self):
+        best_bid, best_ask, bids, asks, buy_2, sell_3, max_buy, max_sell = self.states[0]
+        self.assertEqual(best_bid, 100.0)
+        self.assertEqual(best_ask, 100.5)
+        self.assertEqual(bids, [(100.0, 1.0), (99.5, 2.0), (99.0, 3.0)])
+        self.assertEqual(asks, [(100.5, 1.0), (101.0, 2.0), (102.0, 4.0)])
+        self.assertAlmostEqual(buy_2, (100.5 + 101.0) / 2)
+        self.assertAlmostEqual(sell_3, (100.0 + 2 * 99.5) / 3)
+        # 100.5 and 101.0 are within 0.5% of 100.5, then part of 102.0 until the average reaches the limit.
+        limit = 100.5 * 1.005
+        self.assertAlmostEqual(max_buy, 3.0 + (limit * 3.0 - (100.5 + 2 * 101.0)) / (102.0 - limit))
+
+    def test_updates(self):
+        self.assertEqual(self.states[1][0], 100.2)
+        # count 0 deletes the level, the next one becomes the best ask.
+        self.assertEqual(self.states[2][1], 101.0)
+        self.assertEqual(self.states[3][3], [(101.0, 3.0), (102.0, 4.0)])
+
+        best_bid, best_ask, bids, asks, buy_2, sell_3, max_buy, max_sell = self.states[-1]
+        self.assertEqual((best_bid, best_ask), (100.2, 101.0))
+        self.assertEqual(bids, [(100.2, 0.5), (100.0, 1.0), (99.0, 3.0)])
+        self.assertEqual(asks, [(101.0, 3.0), (102.0, 4.0)])
+        self.assertAlmostEqual(buy_2, 101.0)
+        self.assertAlmostEqual(sell_3, (0.5 * 100.2 + 100.0 + 1.5 * 99.0) / 3)
+        limit = 100.2 * 0.999
+        self.assertAlmostEqual(max_sell, 0.5 + (limit * 0.5 - 0.5 * 100.2) / (100.0 - limit))
+
+    def test_fill_beyond_depth(self):
+        book = OrderBook.from_json('[[100.0,1,1.0],[101.0,1,-1.0]]')
+        self.assertIsNone(book.expected_fill_price(2.0, 'buy'))
+        self.assertEqual(book.max_size('buy', 0.5), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,40 +1,110 @@
-import engine
+import startup
+import sys
 import time
-import os
 
+with startup.phase('import'):
+    import engine
+    import exchange
+    import logger
+    import server
+    import view
+    import workers
 
-TRADE_PAIR = 'BTCUSD'
+
+TRADE_PAIRS = ['BTCUSD']
 TIME_FRAME = '3h'
 SIZE = 500
 TICK = int(60000 / 1000)  # 60S
+LOG_FILE = 'log.jsonl'
 
 
 class TradingBotConsole(object):
-    def __init__(self):
-        self.engine = engine.Engine(TRADE_PAIR, TIME_FRAME, SIZE)
+    def __init__(self, trade_pairs=None, headless=False, use_workers=False, serve=False):
+        self.trade_pairs = trade_pairs or TRADE_PAIRS
+        self.engines = [engine.Engine(trade_pair, TIME_FRAME, SIZE, batch_orders=True)
+                        for trade_pair in self.trade_pairs]
+        self.pool = workers.WorkerPool(self.engines) if use_workers else None
+        self.server = server.SnapshotServer() if serve else None
+        self.log = logger.LogWriter(LOG_FILE)
+        self.headless = headless
+        if headless:
+            self.view = None
+        elif len(self.engines) == 1:
+            self.view = view.TerminalView()
+        else:
+            self.view = view.DashboardView(self.trade_pairs)
         self._is_running = True
 
-    def start(self):
-        self.run()
+    def start(self, startup_report=False):
+        self.log.start()
+        if self.server is not None:
+            self.server.start()
+        if self.pool is not None:
+            with startup.phase('workers'):
+                self.pool.start()
+        with startup.phase('warm_up'):
+            engine.warm_up(self.engines)
+        if startup_report:
+            print(startup.report())
+        try:
+            self.run()
+        finally:
+            if self.pool is not None:
+                self.pool.stop()
+            if self.server is not None:
+                self.server.stop()
+            self.log.stop()
 
     def run(self):
         while self._is_running:
             try:
                 start_time = time.time()
-                report = self.engine.loop_once().string_buffer
-                os.system('cls' if os.name == 'nt' else 'clear')
-                print(report)
+                try:
+                    if self.pool is not None:
+                        reports = self.pool.loop_once()
+                    else:
+                        reports = [e.loop_once() for e in self.engines]
+                finally:
+                    # Orders queued by the engines that ran before a failing one still go out on this tick.
+                    self.flush_orders()
+                for report in reports:
+                    if report.write_on_log:
+                        self.log.write('action', **report.to_record())
+                for e in self.engines:
+                    for record in e.shadow_records:
+                        self.log.write('shadow', trade_pair=e.trade_pair, **record)
+                if self.server is not None:
+                    self.server.publish(self.engines, reports)
+                self.show(reports)
                 sleep_time = TICK - (time.time() - start_time)
             except Exception as e:
+                self.log.write('error', trade_pairs=self.trade_pairs, error=repr(e))
                 time.sleep(TICK)
-                print(e)
+                if not self.headless:
+                    print(e)
             else:
                 if sleep_time >= 0:
                     time.sleep(sleep_time)
                 else:
                     time.sleep(TICK)
 
+    def flush_orders(self):
+        _, failures = exchange.OrderBatch.flush_all()
+        for failure in failures:
+            self.log.write('error', trade_pairs=self.trade_pairs, **failure)
+
+    def show(self, reports):
+        # Headless runs never read the reports, so none of their lazy fields are ever computed.
+        if self.view is None:
+            return
+        if isinstance(self.view, view.DashboardView):
+            self.view.render(reports)
+        else:
+            self.view.render(reports[0].string_buffer)
+
 
 if __name__ == '__main__':
-    app = TradingBotConsole()
-    app.start()
+    with startup.phase('construct'):
+        app = TradingBotConsole(headless='--headless' in sys.argv[1:], use_workers='--workers' in sys.argv[1:],
+                                serve='--serve' in sys.argv[1:])
+    app.start(startup_report='--startup-report' in sys.argv[1:])
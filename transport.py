@@ -0,0 +1,148 @@
+import base64
+import collections
+import gzip
+import json
+import startup
+import threading
+import time
+
+requests = startup.lazy_import('requests')
+
+
+class Response(object):
+    __slots__ = ('status_code', 'content', 'elapsed')
+
+    def __init__(self, status_code, content, elapsed=0.0):
+        self.status_code = status_code
+        self.content = content
+        self.elapsed = elapsed
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class CassetteExhausted(Exception):
+    pass
+
+
+class LiveTransport(object):
+    def request(self, method, url, headers=None):
+        start_time = time.perf_counter()
+        response = requests.request(method, url, headers=headers)
+        return Response(response.status_code, response.content, time.perf_counter() - start_time)
+
+    def close(self):
+        pass
+
+
+class RecordingTransport(object):
+    def __init__(self, filename, inner=None):
+        self._inner = inner or LiveTransport()
+        self._file = gzip.open(filename, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def request(self, method, url, headers=None):
+        response = self._inner.request(method, url, headers)
+        try:
+            content, encoding = response.content.decode('utf-8'), 'u'
+        except UnicodeDecodeError:
+            content, encoding = base64.b64encode(response.content).decode('ascii'), 'b'
+        # Headers are not kept, they carry the API key and a signature that is only valid once.
+        line = json.dumps([method, url, response.status_code, round(response.elapsed, 6), encoding, content],
+                          separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self.recorded += 1
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport(object):
+    def __init__(self, filename, latency_scale=1.0, loop=False):
+        # Responses are served per (method, url) in the order they were recorded, a signed request matches on its
+        # path only since its payload carries a fresh nonce on every run.
+        self._latency_scale = latency_scale
+        self._loop = loop
+        self._queues = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+        self.served = 0
+        with gzip.open(filename, 'rt', encoding='utf-8') as file:
+            for line in file:
+                method, url, status_code, elapsed, encoding, content = json.loads(line)
+                content = content.encode('utf-8') if encoding == 'u' else base64.b64decode(content)
+                self._queues[(method, url)].append(Response(status_code, content, elapsed))
+
+    def request(self, method, url, headers=None):
+        with self._lock:
+            queue = self._queues.get((method, url))
+            if not queue:
+                raise CassetteExhausted(f'{method} {url}')
+            response = queue.popleft()
+            if self._loop:
+                queue.append(response)
+            self.served += 1
+        if self._latency_scale > 0 and response.elapsed > 0:
+            time.sleep(response.elapsed * self._latency_scale)
+        return response
+
+    def close(self):
+        pass
+
+
+_transport = LiveTransport()
+
+
+def use(transport):
+    global _transport
+    previous, _transport = _transport, transport
+    return previous
+
+
+def current():
+    return _transport
+
+
+def request(method, url, headers=None):
+    return _transport.request(method, url, headers)
+
+
+def get(url, headers=None):
+    return _transport.request('GET', url, headers)
+
+
+class _Using(object):
+    def __init__(self, transport):
+        self.transport = transport
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = use(self.transport)
+        return self.transport
+
+    def __exit__(self, *exc):
+        use(self._previous)
+        self.transport.close()
+
+
+def recording(filename):
+    return _Using(RecordingTransport(filename))
+
+
+def replaying(filename, latency_scale=1.0, loop=False):
+    return _Using(ReplayTransport(filename, latency_scale, loop))
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()
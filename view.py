@@ -1,8 +1,19 @@
+import sys
 import time
 
 
 class ReportView(object):
+    FIELDS = (
+        'trade_pair', 'timestamp', 'action_msg',
+        'base', 'amount', 'pl', 'pl_perc', 'pl_high_perc',
+        'real_available_usd', 'total_usd', 'last_price', 'peak_price', 'peak_price_perc',
+        'bottom_price', 'bottom_price_perc', 'daily_volume',
+        'fast_ema', 'slow_ema', 'ratio_ema',
+        'fast_sma', 'mid_sma', 'slow_sma', 'basis', 'upper', 'lower', 'rsi', 'rsi_change', 'kox'
+    )
+
     def __init__(self):
+        self._getters = {}
         self.trade_pair = ''
         self.timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
 
@@ -39,8 +50,36 @@ class ReportView(object):
 
         self.write_on_log = False
 
+    def __getattr__(self, name):
+        # Only reached for fields bound lazily, the value is computed once and then kept as a plain attribute.
+        getters = self.__dict__.get('_getters')
+        if getters is None or name not in getters:
+            raise AttributeError(name)
+        value = getters.pop(name)()
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        getters = self.__dict__.get('_getters')
+        if getters:
+            getters.pop(name, None)
+        object.__setattr__(self, name, value)
+
+    def bind(self, name, getter):
+        self.__dict__.pop(name, None)
+        self._getters[name] = getter
+
+    def resolve(self):
+        for name in list(self._getters):
+            getattr(self, name)
+
+    def changed_fields(self, previous, fields=FIELDS):
+        if previous is None:
+            return list(fields)
+        return [name for name in fields if getattr(self, name) != getattr(previous, name)]
+
     def to_json(self):
-        return str(self.__dict__).replace('\'', '"')
+        return str(self.to_record()).replace('\'', '"')
 
     @property
     def string_buffer(self):
@@ -92,9 +131,79 @@ class ReportView(object):
         elif action == 'release' and position == 'long-position':
             self.action_msg = 'Emergency, Release Long Position'
 
-        # Log.
-        with open('log.txt', 'a') as file:
-            file.write(self.string_buffer)
+        # Log, the record is written asynchronously by whoever owns the LogWriter.
+        self.write_on_log = True
+
+    def to_record(self):
+        self.resolve()
+        return {name: value for name, value in self.__dict__.items() if not name.startswith('_')}
+
+
+class TerminalView(object):
+    HOME = '\x1b[H'
+    CLEAR_TO_END = '\x1b[J'
+    CLEAR_LINE_END = '\x1b[K'
+
+    def __init__(self, stream=None):
+        self._stream = stream if stream is not None else sys.stdout
+
+    def render(self, text):
+        lines = text.split('\n')
+        frame = TerminalView.HOME + ''.join(line + TerminalView.CLEAR_LINE_END + '\n' for line in lines)
+        self._stream.write(frame + TerminalView.CLEAR_TO_END)
+        self._stream.flush()
+
+
+class DashboardView(object):
+    LABEL_WIDTH = 20
+    CELL_WIDTH = 16
+    FIELDS = (
+        'timestamp', 'action_msg', 'amount', 'pl_perc', 'pl_high_perc', 'total_usd', 'last_price',
+        'peak_price', 'bottom_price', 'ratio_ema', 'rsi', 'kox'
+    )
+
+    def __init__(self, trade_pairs, stream=None, fields=FIELDS):
+        self._trade_pairs = list(trade_pairs)
+        self._fields = list(fields)
+        self._rows = {name: i for i, name in enumerate(self._fields)}
+        self._stream = stream if stream is not None else sys.stdout
+        self._previous = {}
+        self._drawn = False
+
+    def render(self, reports):
+        out = []
+        if not self._drawn:
+            out.append(TerminalView.HOME + TerminalView.CLEAR_TO_END)
+            out.append(self._cell_at(0, 0, 'Trading Bot', DashboardView.LABEL_WIDTH))
+            for col, trade_pair in enumerate(self._trade_pairs):
+                out.append(self._cell_at(0, col + 1, trade_pair))
+            for name, row in self._rows.items():
+                out.append(self._cell_at(row + 1, 0, name, DashboardView.LABEL_WIDTH))
+            self._drawn = True
+
+        # Only the cells whose value changed since the previous frame are formatted and redrawn.
+        for report in reports:
+            col = self._trade_pairs.index(report.trade_pair) + 1
+            previous = self._previous.get(report.trade_pair)
+            for name in report.changed_fields(previous, self._fields):
+                out.append(self._cell_at(self._rows[name] + 1, col, self._format(getattr(report, name))))
+            self._previous[report.trade_pair] = report
+
+        if out:
+            out.append(f'\x1b[{len(self._fields) + 2};1H')
+            self._stream.write(''.join(out))
+            self._stream.flush()
+
+    @staticmethod
+    def _format(value):
+        if isinstance(value, float):
+            return f'{value:,.4f}'
+        return str(value)
+
+    @staticmethod
+    def _cell_at(row, col, text, width=CELL_WIDTH):
+        x = 1 if col == 0 else DashboardView.LABEL_WIDTH + 1 + (col - 1) * DashboardView.CELL_WIDTH
+        return f'\x1b[{row + 1};{x}H' + text[:width - 1].ljust(width - 1)
 
 
 def main():
@@ -0,0 +1,225 @@
+import candlestick
+import multiprocessing
+import strategy
+import time
+
+
+class WorkerHistory(candlestick.CandleHistory):
+    def apply(self, candles, reset):
+        # The first candle of a delta is the one last seen, it may have changed since and is replaced.
+        if reset or not self._candle_list:
+            self._candle_list = list(candles)
+        else:
+            first_mts = candles[0].mts if candles else None
+            while self._candle_list and first_mts is not None and self._candle_list[-1].mts >= first_mts:
+                self._candle_list.pop()
+            self._candle_list.extend(candles)
+        del self._candle_list[:-self._size]
+        self._columns = {}
+
+    def update(self):
+        pass
+
+
+def _serve(conn, trade_pair, time_frame, size):
+    history = WorkerHistory(trade_pair, time_frame, size)
+    strategies = (strategy.StrategyOne(), strategy.StrategyTwo())
+    while True:
+        message = conn.recv()
+        command = message[0]
+        try:
+            if command == 'think':
+                _, candles, reset, response_size = message
+                history.apply(candles, reset)
+                codes = [s.think(history, response_size) for s in strategies]
+                frames = [s.snapshot().tail(WorkerPool.REPORT_ROWS) for s in strategies]
+                conn.send(('ok', codes, frames))
+            elif command == 'signals':
+                _, index, candles = message
+                full_history = WorkerHistory(trade_pair, time_frame, len(candles))
+                full_history.apply(candles, True)
+                conn.send(('ok', strategies[index].signals(full_history)))
+            elif command == 'get_state':
+                conn.send(('ok', [s.get_state() for s in strategies]))
+            elif command == 'set_state':
+                strategies[message[1]].set_state(message[2])
+                conn.send(('ok',))
+            elif command == 'stop':
+                conn.send(('ok',))
+                break
+        except Exception as e:
+            conn.send(('error', repr(e)))
+    conn.close()
+
+
+class StrategyWorker(object):
+    def __init__(self, trade_pair, time_frame, size):
+        self.trade_pair = trade_pair
+        self.time_frame = time_frame
+        self.size = size
+        self._last_mts = None
+        self._conn = None
+        self._process = None
+
+    def start(self):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_serve, name=f'StrategyWorker-{self.trade_pair}', daemon=True,
+                                                args=(child_conn, self.trade_pair, self.time_frame, self.size))
+        self._process.start()
+        child_conn.close()
+        return self
+
+    def stop(self, timeout=5.0):
+        if self._process is not None:
+            try:
+                self._call('stop')
+            except (EOFError, OSError, RuntimeError):
+                pass
+            self._process.join(timeout)
+            self._conn.close()
+            self._process = None
+
+    def restart(self):
+        # A dead worker is replaced, the new one gets the whole history on the next submit.
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+            self._process = None
+        self._last_mts = None
+        return self.start()
+
+    def _call(self, *message):
+        self._conn.send(message)
+        return self._receive()
+
+    def _receive(self):
+        reply = self._conn.recv()
+        if reply[0] == 'error':
+            raise RuntimeError(f'{self.trade_pair} worker: {reply[1]}')
+        return reply[1:]
+
+    def submit(self, history, response_size):
+        # Only the candles the worker has not seen yet are pickled, the whole history only after a gap.
+        candles = history.since(self._last_mts) if self._last_mts is not None else None
+        reset = candles is None
+        if reset:
+            candles = history.candles
+        try:
+            self._conn.send(('think', candles, reset, response_size))
+        except OSError:
+            self.restart()
+            raise
+        if candles:
+            self._last_mts = candles[-1].mts
+
+    def collect(self):
+        try:
+            return self._receive()
+        except RuntimeError:
+            self._last_mts = None
+            raise
+        except (EOFError, OSError):
+            self.restart()
+            raise
+
+    def signals(self, index, history):
+        return self._call('signals', index, history.candles)[0]
+
+    def get_state(self):
+        return self._call('get_state')[0]
+
+    def set_state(self, index, state):
+        self._call('set_state', index, state)
+
+
+class RemoteStrategy(strategy.Strategy):
+    def __init__(self, worker, index):
+        self._worker = worker
+        self._index = index
+        self._df = None
+
+    def to_sheet(self):
+        return self._df.to_dict('list')
+
+    def think(self, history, response):
+        # Outside of the pool's tick the worker still evaluates both strategies, only this one's result is kept.
+        self._worker.submit(history, response)
+        codes, frames = self._worker.collect()
+        self._df = frames[self._index]
+        return codes[self._index]
+
+    def signals(self, history):
+        return self._worker.signals(self._index, history)
+
+    def get_state(self):
+        return self._worker.get_state()[self._index]
+
+    def set_state(self, state):
+        self._worker.set_state(self._index, state)
+
+
+class WorkerPool(object):
+    REPORT_ROWS = 4  # rsi_change looks 4 rows back
+
+    def __init__(self, engines):
+        self.engines = engines
+        self.workers = []
+        for e in engines:
+            worker = StrategyWorker(e.trade_pair, e.time_frame, e.size)
+            e.stgy1 = RemoteStrategy(worker, 0)
+            e.stgy2 = RemoteStrategy(worker, 1)
+            self.workers.append(worker)
+        self.tick_time = 0.0
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        return self
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def loop_once(self):
+        for e in self.engines:
+            e.fetch()
+
+        # Every worker gets its delta before any result is read, so the pairs are evaluated in parallel.
+        start_time = time.perf_counter()
+        error = None
+        submitted = []
+        for e, worker in zip(self.engines, self.workers):
+            try:
+                worker.submit(e.history, int(e.size / 2))
+            except OSError as ex:
+                error = error or ex
+                continue
+            submitted.append((e, worker))
+        results = []
+        for e, worker in submitted:
+            # Every reply is read even after a failure, an unread one would be taken for the next tick's.
+            # A worker that died is restarted by collect() and resynced with the whole history next tick.
+            try:
+                codes, frames = worker.collect()
+            except (RuntimeError, EOFError, OSError) as ex:
+                error = error or ex
+                continue
+            e.stgy1._df, e.stgy2._df = frames
+            results.append(codes)
+        self.tick_time = time.perf_counter() - start_time
+        if error is not None:
+            raise error
+
+        reports = [e.route(*codes) for e, codes in zip(self.engines, results)]
+        for e in self.engines:
+            e.shadow_tick()
+        return reports
+
+
+def main():
+    pass
+
+
+if __name__ == '__main__':
+    main()